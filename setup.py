@@ -20,6 +20,11 @@ setup(
         'sphinx',
         'importlib_resources'
     ],
+    extras_require={
+        'brotli': ['brotli'],
+        'fonts': ['fonttools', 'brotli'],
+        'images': ['Pillow'],
+    },
     include_package_data=True,
     classifiers=[
         'Framework :: Sphinx',
@@ -3,6 +3,7 @@
 __version__ = '0.1.1'
 
 from sphinx.application import Sphinx
+from sphinx.config import ENUM
 
 from sphinx_revealit.builders import RevealjsHTMLBuilder
 from sphinx_revealit.directives import (
@@ -29,6 +30,7 @@ from sphinx_revealit.nodes import (
     revealjs_title,
 )
 from sphinx_revealit.themes import get_theme_path
+from sphinx_revealit.transforms import RevealjsSectionMetadata
 from sphinx_revealit.writers import (
     not_write,
     depart_revealjs_break,
@@ -63,6 +65,8 @@ def setup(app: Sphinx):
         revealjs_title, html=(not_write, not_write), revealjs=(visit_revealjs_element, depart_revealjs_element)
     )
 
+    app.add_transform(RevealjsSectionMetadata)
+
     app.add_directive('rjs-deck', RevealjsDeck)
     app.add_directive('rjs-break', RevealjsBreak)
     app.add_directive('rjs-section', RevealjsSection)
@@ -76,22 +80,44 @@ def setup(app: Sphinx):
     app.add_directive('rjs-box', RevealjsBox)
     app.add_directive('rjs-title', RevealjsTitle)
 
-    app.add_config_value('revealjs_static_path', [], True)
-    app.add_config_value('revealjs_style_theme', 'black', True)
-    app.add_config_value('revealjs_use_tailwind', False, True)
-    app.add_config_value('revealjs_purge_tailwind', True, True)
-    app.add_config_value('revealjs_css_files', [], True)
-    app.add_config_value('revealjs_script_files', [], True)
-    app.add_config_value('revealjs_script_conf', None, True)
-    app.add_config_value('revealjs_script_plugins', [], True)
+    app.add_config_value('revealjs_static_path', [], 'env')
+    app.add_config_value('revealjs_style_theme', 'black', 'html')
+    app.add_config_value('revealjs_use_tailwind', False, 'env')
+    app.add_config_value('revealjs_purge_tailwind', True, 'env')
+    app.add_config_value('revealjs_static_link', 'copy', 'html',
+                         ENUM('copy', 'hardlink', 'reflink'))
+    app.add_config_value('revealjs_purge_cache_size', 16 * 1024 * 1024, '')
+    app.add_config_value('revealjs_purge_css', False, 'html')
+    app.add_config_value('revealjs_purge_safelist', [], 'html')
+    app.add_config_value('revealjs_minify', False, 'html')
+    app.add_config_value('revealjs_highlight_cache_size', 16 * 1024 * 1024, '')
+    app.add_config_value('revealjs_compact_code', False, 'html')
+    app.add_config_value('revealjs_lazy_loading', False, 'html')
+    app.add_config_value('revealjs_eager_slides', 3, 'html')
+    app.add_config_value('revealjs_optimize_images', False, 'html')
+    app.add_config_value('revealjs_image_max_size', (1920, 1080), 'html')
+    app.add_config_value('revealjs_image_quality', 85, 'html')
+    app.add_config_value('revealjs_image_webp', False, 'html')
+    app.add_config_value('revealjs_image_cache_size', 256 * 1024 * 1024, '')
+    app.add_config_value('revealjs_bundle', False, 'html')
+    app.add_config_value('revealjs_single_file', False, 'html')
+    app.add_config_value('revealjs_precompress', [], 'html', ENUM('gzip', 'br'))
+    app.add_config_value('revealjs_profile', False, '')
+    app.add_event('revealjs-profile')
+    app.add_config_value('revealjs_css_files', [], 'html')
+    app.add_config_value('revealjs_script_files', [], 'html')
+    app.add_config_value('revealjs_script_conf', None, 'html')
+    app.add_config_value('revealjs_script_plugins', [], 'html')
 
-    app.add_config_value('revealjs_font_body', '', True)
-    app.add_config_value('revealjs_font_title', '', True)
-    app.add_config_value('revealjs_font_code', '', True)
+    app.add_config_value('revealjs_font_body', '', 'html', [str, dict])
+    app.add_config_value('revealjs_font_title', '', 'html', [str, dict])
+    app.add_config_value('revealjs_font_code', '', 'html', [str, dict])
+    app.add_config_value('revealjs_font_subset', True, 'env')
 
     app.add_html_theme('sphinx_revealit', str(get_theme_path('sphinx_revealit')))
     return {
         'version': __version__,
-        'env_version': 1,
-        'parallel_read_safe': False,
+        'env_version': 3,
+        'parallel_read_safe': True,
+        'parallel_write_safe': True,
     }
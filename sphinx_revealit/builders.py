@@ -1,26 +1,88 @@
 """Definition for sphinx custom builder."""
 import copy
-import logging
+import json
+import multiprocessing
+import os
+import posixpath
 import shutil
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from logging import WARNING
 from os import path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
 
+import pygments
 from docutils.nodes import Node
 from docutils.parsers.rst import directives
 from importlib_resources import files
-from sphinx.builders.html import StandaloneHTMLBuilder
+from sphinx.builders.html import BuildInfo, StandaloneHTMLBuilder, get_stable_hash
 from sphinx.highlighting import PygmentsBridge
-from sphinx.util import progress_message, status_iterator
+from sphinx.util import logging, progress_message, status_iterator
+from sphinx.util.console import bold  # type: ignore
+from sphinx.util.matching import DOTFILES, Matcher
+from sphinx.util.osutil import copyfile, ensuredir, relpath
 
-from sphinx_revealit.collectors import RevealjsImageCollector, CSSClassCollector
+from sphinx_revealit import bundle, compress, fonts, images, minify, staticsync
+from sphinx_revealit.cache import FileCache, digest, whitelist_digest
+from sphinx_revealit.collectors import (
+    CSSClassCollector,
+    DeckCollector,
+    FontTextCollector,
+    RevealjsImageCollector,
+)
 from sphinx_revealit.contexts import RevealjsPlugin, RevealjsProjectContext
-from sphinx_revealit.csspurge import CSSPurge
-from sphinx_revealit.nodes import RevealjsNode
-from sphinx_revealit.utils import RjsPygmentsFormatter, static_resource_uri, sphinx_gte_4
+from sphinx_revealit.csspurge import CSSIndex, CSSPurge
+from sphinx_revealit.inline import AssetInliner, is_local
+from sphinx_revealit.nodes import RevealjsNode, revealjs_deck
+from sphinx_revealit.profiling import NULL_PROFILER, Profiler
+from sphinx_revealit.transforms import get_document_deck
+from sphinx_revealit.utils import (
+    RjsPygmentsFormatter,
+    sphinx_gte_4,
+    static_resource_uri,
+    to_json,
+)
 from sphinx_revealit.writers import RevealjsSlideTranslator
 
 logger = logging.getLogger(__name__)
 
+PACKAGE_DIR = path.dirname(path.abspath(__file__))
+
+# Config values compared per page by get_outdated_docs instead of
+# rewriting all pages (a deck may override them)
+PAGE_CONFIG_VALUES = (
+    'revealjs_style_theme', 'revealjs_css_files', 'revealjs_script_files',
+    'revealjs_script_conf', 'revealjs_script_plugins',
+    'revealjs_font_body', 'revealjs_font_title', 'revealjs_font_code',
+)
+
+# Classes reveal.js, its plugins and sphinx_revealit.js add at runtime,
+# these are never found in the written pages.
+REVEALJS_RUNTIME_CLASSES = frozenset({
+    # page.html
+    'reveal', 'slides',
+    # reveal.js
+    'aria-status', 'backgrounds', 'center', 'close', 'controls', 'controls-arrow',
+    'current-fragment', 'disable-slide-transitions', 'disabled', 'enabled', 'external',
+    'focused', 'fragment', 'fragmented', 'future', 'has-dark-background',
+    'has-horizontal-slides', 'has-light-background', 'has-parallax-background',
+    'has-vertical-slides', 'highlight', 'icon', 'loaded', 'navigate-down',
+    'navigate-left', 'navigate-right', 'navigate-up', 'no-hover', 'no-transition',
+    'notes-placeholder',
+    'overlay', 'overlay-help', 'overlay-preview', 'overview', 'overview-deactivating',
+    'past', 'paused', 'pause-overlay', 'pdf-page', 'playback', 'present', 'print-pdf',
+    'progress', 'ready', 'resume-button', 'reveal-full-page', 'reveal-viewport',
+    'show-notes', 'slide-background', 'slide-background-content', 'slide-number',
+    'slide-number-a', 'slide-number-b', 'slide-number-delimiter', 'slide-number-pdf',
+    'speaker-notes', 'speaker-notes-pdf', 'spinner', 'stack', 'title', 'viewport',
+    'viewport-inner', 'visible', 'x-frame-error',
+    # Transitions (set as class of the reveal element)
+    'none', 'fade', 'slide', 'convex', 'concave', 'zoom',
+    # Plugins
+    'hidden', 'mute', 'searchbox', 'zoomed',
+    # sphinx_revealit.js
+    'has-highlights', 'highlight-line',
+})
+
 
 class RevealjsHTMLBuilder(StandaloneHTMLBuilder):
     """Sphinx builder class to generate Reveal.js presentation HTML.
@@ -34,14 +96,130 @@ class RevealjsHTMLBuilder(StandaloneHTMLBuilder):
 
     def __init__(self, app):  # noqa: D107
         super().__init__(app)
+        if self.config.revealjs_profile:
+            self.profiler = Profiler(path.join(self.doctreedir, 'revealit_profile'))
+        else:
+            self.profiler = NULL_PROFILER
         self.revealjs_deck = None
         self.builtin_files = set()
+        # Theme and deck stylesheets used by the written pages
+        self.deck_css_files = set()
+        # Destination -> source of the static files to synchronize
+        self.static_files = {}  # type: Dict[str, str]
+        # Bundle key -> bundled files, registered by the written pages
+        self.bundles = {}  # type: Dict[str, List[str]]
+        self.purge_cache = FileCache(path.join(self.doctreedir, 'revealit_purge'),
+                                     self.config.revealjs_purge_cache_size)
+        self.minify_cache = FileCache(path.join(self.doctreedir, 'revealit_minify'),
+                                      self.config.revealjs_purge_cache_size)
+        self.highlight_cache = FileCache(
+            path.join(self.doctreedir, 'revealit_highlight'),
+            self.config.revealjs_highlight_cache_size)
+        self.image_cache = FileCache(path.join(self.doctreedir, 'revealit_images'),
+                                     self.config.revealjs_image_cache_size)
+        optimize = self.config.revealjs_optimize_images
+        self.optimize_images = optimize and images.available()
+        if optimize and not self.optimize_images:
+            logger.warning('Pillow is not installed, images are not optimized')
+        # Whether the translator refers to WebP variants of images
+        self.image_webp = self.optimize_images and self.config.revealjs_image_webp
+        # Image source -> whether a WebP variant is written
+        self.webp_images = {}  # type: Dict[str, bool]
+        # Role (body, title, code) -> font, the roles set in the config
+        self.fonts, self.configured_fonts = self.get_fonts()
+        subset = self.config.revealjs_font_subset and fonts.can_subset()
+        self.subset_fonts = subset and any(
+            font.subset and font.faces for font in self.fonts.values())
+        self.font_digest = digest(
+            str(fonts.version), json.dumps(sorted(self.configured_fonts)), *[
+                part for font in self.fonts.values()
+                for part in [font.family, font.fallback] + [
+                    p for face in font.faces for p in face.digest_parts()]
+            ])
+        # Key -> characters of text and code, registered by the written pages
+        self.font_sets = {}  # type: Dict[str, Tuple[str, str]]
+        # Theme -> heading font weight, for preloading the title font
+        self.heading_weights = {}  # type: Dict[str, int]
+        # Docname -> digest of the deck configuration of the written pages
+        self.page_configs = {}  # type: Dict[str, str]
+        # Shared with the worker processes of parallel builds
+        self.highlight_hits = multiprocessing.Value('L', 0)
+        self.highlight_misses = multiprocessing.Value('L', 0)
 
         app.add_env_collector(RevealjsImageCollector)
+        app.add_env_collector(DeckCollector)
 
         if self.config.revealjs_use_tailwind and self.config.revealjs_purge_tailwind:
             app.add_env_collector(CSSClassCollector)
 
+        # Independent of the fonts, these are not an environment option
+        if self.config.revealjs_font_subset and fonts.can_subset():
+            app.add_env_collector(FontTextCollector)
+
+    def create_build_info(self) -> BuildInfo:
+        """Leave out the config values compared per page by ``get_outdated_docs``."""
+        build_info = super().create_build_info()
+        values = {item.name: item.value for item in self.config.filter('html')
+                  if item.name not in PAGE_CONFIG_VALUES}
+        build_info.config_hash = get_stable_hash(values)
+        return build_info
+
+    def get_page_config(self, docname: str) -> Optional[str]:
+        """Return a digest of the deck configuration of a page (None if unknown).
+
+        Covers the per-page config values not overridden by the deck of the
+        page, the deck options and the served fonts.
+        """
+        decks = getattr(self.env, 'rjs_doc_decks', {})
+        if docname not in decks:
+            return None
+        deck_opts, content = decks[docname]
+
+        values = {name: self.config[name] for name in PAGE_CONFIG_VALUES}
+        if 'theme' in deck_opts:
+            del values['revealjs_style_theme']
+        return digest(self.font_digest, json.dumps([values, deck_opts, content],
+                                                   sort_keys=True, default=repr))
+
+    def get_outdated_docs(self) -> Iterator[str]:
+        """Add the pages whose deck configuration changed since they were written."""
+        outdated = set()
+        for docname in super().get_outdated_docs():
+            outdated.add(docname)
+            yield docname
+
+        pages_file = path.join(self.doctreedir, 'revealit_pages.json')
+        pages = {}
+        if path.isfile(pages_file):
+            with open(pages_file, encoding='utf-8') as f:
+                pages = json.load(f)
+
+        for docname in self.env.found_docs:
+            if docname in outdated:
+                continue
+            config = self.get_page_config(docname)
+            if config is None or pages.get(docname) != config:
+                yield docname
+
+    def write_page_configs(self) -> None:
+        """Store the deck configuration of the written pages.
+
+        :meth:`get_outdated_docs` compares it on the next build.
+        """
+        pages_file = path.join(self.doctreedir, 'revealit_pages.json')
+        pages = {}
+        if path.isfile(pages_file):
+            with open(pages_file, encoding='utf-8') as f:
+                pages = json.load(f)
+        pages.update(self.page_configs)
+        # Forget removed documents
+        pages = {docname: config for docname, config in pages.items()
+                 if docname in self.env.found_docs}
+
+        with open(pages_file + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(pages, f, sort_keys=True)
+        os.replace(pages_file + '.tmp', pages_file)
+
     @property
     def revealjs_deck_opts(self) -> dict:
         if self.revealjs_deck:
@@ -59,7 +237,8 @@ class RevealjsHTMLBuilder(StandaloneHTMLBuilder):
             # Builtin plugin
             if isinstance(plugin, str):
                 self.builtin_files.add(self.get_builtin_plugin_path(plugin))
-                plugins.append(RevealjsPlugin(static_resource_uri(plugin + '.js'), plugin))
+                uri = static_resource_uri(plugin + '.js')
+                plugins.append(RevealjsPlugin(uri, plugin))
             else:
                 uri = static_resource_uri(plugin['src'])
                 plugins.append(RevealjsPlugin(uri, plugin.get('name', '')))
@@ -133,34 +312,301 @@ class RevealjsHTMLBuilder(StandaloneHTMLBuilder):
     ) -> None:  # noqa
         """Page context gets passed to the templating engine"""
 
-        self.configure_theme(ctx)
+        ctx['css_files'] = self.get_page_css_files(
+            ctx['css_files'], self.revealjs_deck_opts, pagename)
+        ctx['revealjs_font_preloads'] = self.get_font_preloads(
+            pagename, self.revealjs_deck_opts)
         ctx['revealjs_page_confs'] = self.configure_page_script_conf()
 
+        if self.config.revealjs_lazy_loading:
+            # Default for the slides around the current one to load
+            view_distance = max(1, self.config.revealjs_eager_slides)
+            ctx['revealjs_lazy_conf'] = to_json({'viewDistance': view_distance})
+
+        if self.config.revealjs_bundle:
+            ctx['css_files'] = self.bundle_files(ctx['css_files'], 'css')
+            ctx['revealjs_script_bundles'] = self.bundle_files(
+                self.get_page_script_files(), 'js')
+
+    def get_page_css_files(self, css_files: List[str], deck_opts: dict,
+                           docname: str) -> List[str]:
+        """Return the stylesheets of a page with theme, fonts and deck stylesheet."""
+        css_files = list(css_files)
+        # 0: Reveal.js, 1: Revealit styles 2: THEME 3: Fonts
+        css_files.insert(2, self.get_theme_stylesheet(deck_opts))
+        css_files.insert(3, self.get_fonts_stylesheet(docname))
+
         # Deck stylesheet
-        if 'stylesheet' in self.revealjs_deck_opts:
-            uri = directives.uri(self.revealjs_deck_opts['stylesheet'])
-            ctx['css_files'].append(uri)
-
-    def configure_theme(self, ctx: Dict):
-        """Find and add theme css from conf and directive."""
-        # Use directive or conf
-        if 'theme' in self.revealjs_deck_opts:
-            theme = self.revealjs_deck_opts['theme']
-        else:
-            theme = self.config.revealjs_style_theme
+        if 'stylesheet' in deck_opts:
+            css_files.append(directives.uri(deck_opts['stylesheet']))
+        return css_files
+
+    def get_page_script_files(self) -> List[str]:
+        """Return the scripts included by page.html."""
+        script_files = list(self.revealjs_context.script_files)
+        if self.revealjs_context.engine.version == 4:
+            script_files.extend(
+                plugin.src for plugin in self.revealjs_context.script_plugins)
+        return script_files
+
+    def bundle_files(self, files: List[str], ext: str) -> List[str]:
+        """Replace consecutive local files by the placeholder of their bundle.
+
+        Remote files (including protocol-relative and ``data:`` URLs) and
+        stylesheets with extra attributes (e.g. ``media``) are kept, so the
+        order of all files is unchanged.
+        """
+        result = []
+        run = []  # type: List[str]
+
+        def flush():
+            if run:
+                key = bundle.bundle_key(run)
+                self.bundles[key] = list(run)
+                result.append(bundle.placeholder(key, ext))
+                run.clear()
+
+        default_attrs = (('rel', 'stylesheet'), ('type', 'text/css'))
+        for f in files:
+            attrs = getattr(f, 'attributes', {})
+            if not is_local(f) or any(item not in default_attrs
+                                      for item in attrs.items()):
+                flush()
+                result.append(f)
+            else:
+                run.append(str(f))
+        flush()
+        return result
+
+    def get_fonts(self) -> Tuple[Dict[str, fonts.Font], Set[str]]:
+        """Return the fonts of the ``revealjs_font_*`` options.
+
+        Without ``revealjs_font_body``, the theme's Source Sans Pro is served.
+        """
+        result = {}
+        for role in fonts.ROLE_VARIABLES:
+            value = getattr(self.config, 'revealjs_font_' + role)
+            font = fonts.parse_font(value, role, self.confdir)
+            if font:
+                result[role] = font
+        configured = set(result)
+        if 'body' not in result:
+            result['body'] = fonts.default_body_font()
+        return result, configured
+
+    def get_font_text(self, docname: str) -> Tuple[str, str]:
+        """Return the characters of the text and code of a document for subsetting."""
+        if not self.subset_fonts:
+            return '', ''
+        info = getattr(self.env, 'rjs_doc_font_text', {}).get(docname, {})
+        return (fonts.BASE_CHARACTERS + info.get('text', ''),
+                fonts.BASE_CHARACTERS + info.get('code', ''))
+
+    def get_fonts_stylesheet(self, docname: str) -> str:
+        """Return the fonts stylesheet of a page.
+
+        The stylesheet is registered for :meth:`write_font_files`.
+        """
+        text, code = self.get_font_text(docname)
+        key = digest(self.font_digest, text, code)[:16]
+        self.font_sets[key] = (text, code)
+        return f'_static/fonts/revealit-fonts-{key}.css'
+
+    def get_font_file(self, role: str, face: fonts.FontFace, text: str,
+                      code: str) -> Tuple[str, str]:
+        """Return the filename and format of a font file.
+
+        Subset fonts are named by the characters they contain, other fonts
+        are shared by all pages. Fonts shipped with the theme keep their name.
+        """
+        font = self.fonts[role]
+        subset = self.subset_fonts and font.subset
+        if face.static_name and not subset:
+            return face.static_name, fonts.output_format(face, False)
+        chars = self.get_font_chars(font, text, code) if subset else ''
+        key = digest(*face.digest_parts(), chars)[:16]
+        fmt = fonts.output_format(face, subset)
+        return face.output_name(font.family, key, fmt), fmt
+
+    def get_font_chars(self, font: fonts.Font, text: str, code: str) -> str:
+        """Return the characters needed from a font, over all roles using it."""
+        chars = set()
+        for role, other in self.fonts.items():
+            if other.family == font.family:
+                chars.update(code if role == 'code' else text)
+        return ''.join(sorted(chars))
+
+    def get_font_preloads(self, docname: str,
+                          deck_opts: dict) -> List[Tuple[str, str]]:
+        """Return URL and MIME type of the fonts needed by the first slide.
+
+        Headings use the body font unless ``revealjs_font_title`` is set, in
+        the weight set by the theme.
+        """
+        text, code = self.get_font_text(docname)
+        info = getattr(self.env, 'rjs_doc_font_text', {}).get(docname, {})
+        roles = [('body', 400), ('title', self.get_heading_weight(deck_opts))]
+        if info.get('first_code'):
+            roles.append(('code', 400))
+
+        preloads = []
+        for role, weight in roles:
+            if role not in self.fonts:
+                role = 'body'
+            face = self.fonts[role].closest_face(weight)
+            if face is None:
+                continue
+            name, fmt = self.get_font_file(role, face, text, code)
+            preload = (f'_static/fonts/{name}', fonts.MIME_TYPES[fmt])
+            if preload not in preloads:
+                preloads.append(preload)
+        return preloads
+
+    def write_font_files(self) -> None:
+        """Write the font files and fonts stylesheets used by the written pages.
+
+        Existing files are kept, their names depend on their contents.
+        """
+        with self.profiler.phase('fonts'):
+            font_dir = path.join(self.outdir, '_static', 'fonts')
+            ensuredir(font_dir)
+
+            font_sets = status_iterator(sorted(self.font_sets.items()),
+                                        'writing fonts... ', 'brown',
+                                        len(self.font_sets), self.app.verbosity,
+                                        stringify_func=lambda item: item[0])
+            for key, (text, code) in font_sets:
+                css_path = path.join(font_dir, f'revealit-fonts-{key}.css')
+                if path.isfile(css_path):
+                    continue
+
+                files = {}
+                for role, font in self.fonts.items():
+                    for i, face in enumerate(font.faces):
+                        name, fmt = self.get_font_file(role, face, text, code)
+                        files[role, i] = (name, fmt)
+                        dest = path.join(font_dir, name)
+                        if path.isfile(dest):
+                            continue
+                        try:
+                            if self.subset_fonts and font.subset:
+                                chars = self.get_font_chars(font, text, code)
+                                data = fonts.subset_font(face.fpath, chars, fmt)
+                                with open(dest + '.tmp', 'wb') as f:
+                                    f.write(data)
+                                os.replace(dest + '.tmp', dest)
+                            else:
+                                ensuredir(path.dirname(dest))
+                                copyfile(face.fpath, dest)
+                        except Exception as err:
+                            logger.warning('cannot write font file %r: %s',
+                                           face.fpath, err)
+
+                with open(css_path + '.tmp', 'w', encoding='utf-8') as f:
+                    f.write(fonts.fonts_stylesheet(self.fonts, files,
+                                                   self.configured_fonts))
+                os.replace(css_path + '.tmp', css_path)
+
+    def get_theme_name(self, deck_opts: dict) -> str:
+        """Return the theme of a deck (set by directive or conf)."""
+        if 'theme' in deck_opts:
+            return deck_opts['theme']
+        return self.config.revealjs_style_theme
+
+    def get_heading_weight(self, deck_opts: dict) -> int:
+        """Return the heading font weight of the theme of a deck.
+
+        Only builtin themes are read, other themes are assumed to keep the
+        normal weight.
+        """
+        theme = self.get_theme_name(deck_opts)
+        if theme not in self.heading_weights:
+            weight = 400
+            if self.get_theme_stylesheet(deck_opts) == f'_static/{theme}.css':
+                try:
+                    css = self.get_builtin_theme_path(theme).read_text(encoding='utf-8')
+                    weight = fonts.heading_weight(css)
+                except OSError:
+                    pass
+            self.heading_weights[theme] = weight
+        return self.heading_weights[theme]
+
+    def get_theme_stylesheet(self, deck_opts: dict) -> str:
+        """Return the path of the theme stylesheet of a deck."""
+        theme = self.get_theme_name(deck_opts)
 
-        # Build path of stylesheet
         if theme.startswith('http://') or theme.startswith('https://'):
-            pass
+            return theme
         elif theme.endswith('.css'):
-            theme = f'_static/{theme}'
+            return f'_static/{theme}'
         else:
             # Builtin theme
+            return f'_static/{theme}.css'
+
+    def register_deck_files(self, deck_opts: dict) -> None:
+        """Register the builtin files and stylesheets used by a deck.
+
+        Called from :meth:`write_doc_serialized`, which runs in the main
+        process in parallel builds, too.
+        """
+        theme = self.get_theme_name(deck_opts)
+        stylesheet = self.get_theme_stylesheet(deck_opts)
+        # Builtin themes are copied from the package
+        if stylesheet == f'_static/{theme}.css':
             self.builtin_files.add(self.get_builtin_theme_path(theme))
-            theme = f'_static/{theme}.css'
+        self.deck_css_files.add(stylesheet)
+
+        if 'stylesheet' in deck_opts:
+            self.deck_css_files.add(directives.uri(deck_opts['stylesheet']))
+
+    @staticmethod
+    def find_deck(doctree: Node) -> Optional[revealjs_deck]:
+        """Return the deck node of a document."""
+        return get_document_deck(doctree)
+
+    def read(self) -> List[str]:
+        with self.profiler.phase('read'):
+            return super().read()
+
+    def read_doc(self, docname: str) -> None:
+        with self.profiler.phase('read_doc', docname):
+            super().read_doc(docname)
+
+    def write(self, *args: Any, **kwargs: Any) -> None:
+        with self.profiler.phase('write'):
+            super().write(*args, **kwargs)
 
-        # 0: Reveal.js, 1: Revealit styles 2: THEME
-        ctx['css_files'].insert(2, theme)
+    def handle_page(self, pagename: str, *args: Any, **kwargs: Any) -> None:
+        with self.profiler.phase('render', pagename):
+            super().handle_page(pagename, *args, **kwargs)
+
+    def write_doc_serialized(self, docname: str, doctree: Node) -> None:
+        with self.profiler.phase('write_doc_serialized', docname):
+            super().write_doc_serialized(docname, doctree)
+            deck = self.find_deck(doctree)
+            deck_opts = deck.revealit_el.cdata if deck else {}
+            self.register_deck_files(deck_opts)
+            # Pages may be rendered in worker processes, register their fonts here
+            self.get_fonts_stylesheet(docname)
+            config = self.get_page_config(docname)
+            if config is not None:
+                self.page_configs[docname] = config
+
+            # Pages may be rendered in worker processes, register their bundles here
+            if self.config.revealjs_bundle:
+                css_files = self.get_page_css_files(self.css_files, deck_opts, docname)
+                self.bundle_files(css_files, 'css')
+                self.bundle_files(self.get_page_script_files(), 'js')
+
+    def write_doc(self, docname: str, doctree: Node) -> None:
+        with self.profiler.phase('write_doc', docname):
+            # The deck is looked up per document, the translator may run in a
+            # worker process during parallel builds.
+            self.revealjs_deck = self.find_deck(doctree)
+            try:
+                super().write_doc(docname, doctree)
+            finally:
+                self.revealjs_deck = None
 
     def configure_page_script_conf(self) -> List[str]:  # noqa
         if not self.revealjs_deck:
@@ -176,6 +622,39 @@ class RevealjsHTMLBuilder(StandaloneHTMLBuilder):
         PygmentsBridge.html_formatter = RjsPygmentsFormatter
         super().init_highlighter()
 
+        if self.config.revealjs_compact_code:
+            self.highlighter.formatter_args['compact'] = True
+
+    def highlight_block(self, source: str, lang: str, opts: Dict = None,
+                        linenos: bool = False, **kwargs: Any) -> str:
+        """Highlight a code block, reusing the result of previous builds.
+
+        Blocks whose highlighting logs a warning (unknown lexer, lexing
+        failed) are not cached, so the warning is repeated on every build.
+        """
+        key = digest(source, lang, json.dumps(opts or {}, sort_keys=True, default=repr),
+                     str(linenos), json.dumps(self.highlighter.formatter_args,
+                                              sort_keys=True, default=repr),
+                     pygments.__version__, str(RjsPygmentsFormatter.version))
+
+        cached = self.highlight_cache.get(key)
+        if cached:
+            with self.highlight_hits.get_lock():
+                self.highlight_hits.value += 1
+            with open(cached, encoding='utf-8') as f:
+                return f.read()
+
+        with self.highlight_misses.get_lock():
+            self.highlight_misses.value += 1
+        with self.profiler.phase('highlight', self.current_docname):
+            with logging.pending_logging() as memhandler:
+                highlighted = self.highlighter.highlight_block(
+                    source, lang, opts=opts, linenos=linenos, **kwargs)
+                warned = any(r.levelno >= WARNING for r in memhandler.buffer)
+        if not warned:
+            self.highlight_cache.put(key, highlighted.encode('utf-8'), evict=False)
+        return highlighted
+
     def write_genindex(self) -> None:
         pass
 
@@ -192,6 +671,310 @@ class RevealjsHTMLBuilder(StandaloneHTMLBuilder):
 
         super().post_process_images(doctree)
 
+        # Pages only refer to WebP variants which are written
+        if self.image_webp:
+            for src, dest in self.images.items():
+                if src not in self.webp_images:
+                    fpath = path.join(self.srcdir, src)
+                    webp = images.has_webp_variant(dest)
+                    self.webp_images[src] = webp and images.can_convert_webp(fpath)
+
+    def copy_image_files(self) -> None:
+        if self.optimize_images:
+            with self.profiler.phase('optimize_images'):
+                self.optimize_image_files()
+        else:
+            super().copy_image_files()
+
+    def optimize_image_files(self) -> None:
+        """Copy images, downscaled and re-encoded (and with WebP variants).
+
+        Results are cached by the content of the source image and the
+        settings. Images missing in the cache are processed in a process pool.
+        """
+        if not self.images:
+            return
+
+        imagedir = path.join(self.outdir, self.imagedir)
+        ensuredir(imagedir)
+        options = (tuple(self.config.revealjs_image_max_size),
+                   self.config.revealjs_image_quality, self.image_webp)
+        settings = json.dumps(options)
+
+        jobs = {}
+        for src, dest in self.images.items():
+            if not dest.lower().endswith(images.OPTIMIZED_EXTENSIONS):
+                copyfile(path.join(self.srcdir, src), path.join(imagedir, dest))
+                continue
+
+            with open(path.join(self.srcdir, src), 'rb') as f:
+                key = digest('image', str(images.version), settings, f.read())
+            if not self.copy_cached_image(src, key):
+                jobs[src] = key
+
+        if jobs:
+            self.write_optimized_images(jobs, options)
+        self.image_cache.evict()
+
+    def copy_cached_image(self, src: str, key: str) -> bool:
+        """Copy an optimized image (and its WebP variant) from the cache.
+
+        Returns whether the image was cached.
+        """
+        imagedir = path.join(self.outdir, self.imagedir)
+        dest = self.images[src]
+        webp = self.webp_images.get(src, False)
+
+        cached = self.image_cache.get(key)
+        cached_webp = self.image_cache.get(digest(key, 'webp')) if webp else None
+        if not cached or (webp and not cached_webp):
+            return False
+
+        shutil.copyfile(cached, path.join(imagedir, dest))
+        if webp:
+            shutil.copyfile(cached_webp, path.join(imagedir, images.webp_name(dest)))
+        return True
+
+    def write_optimized_images(self, jobs: Dict[str, str], options: tuple) -> None:
+        """Optimize images in a process pool, ``jobs`` maps sources to cache keys."""
+        imagedir = path.join(self.outdir, self.imagedir)
+
+        def write(dest, data):
+            with open(path.join(imagedir, dest), 'wb') as f:
+                f.write(data)
+
+        before = after = 0
+        with ProcessPoolExecutor() as executor:
+            futures = {
+                src: executor.submit(images.optimize_image,
+                                     path.join(self.srcdir, src), *options)
+                for src in sorted(jobs)
+            }
+            for src in status_iterator(futures, 'optimizing images... ', 'brown',
+                                       len(futures), self.app.verbosity):
+                fpath = path.join(self.srcdir, src)
+                dest = self.images[src]
+                try:
+                    data, variant = futures[src].result()
+                except Exception as err:
+                    logger.warning('cannot optimize image file %r: %s', fpath, err)
+                    copyfile(fpath, path.join(imagedir, dest))
+                    continue
+
+                write(dest, data)
+                self.image_cache.put(jobs[src], data, evict=False)
+                if variant is not None and self.webp_images.get(src, False):
+                    write(images.webp_name(dest), variant)
+                    key = digest(jobs[src], 'webp')
+                    self.image_cache.put(key, variant, evict=False)
+                before += path.getsize(fpath)
+                after += len(data)
+
+        logger.info('optimized %d images: %d -> %d bytes', len(jobs), before, after)
+
+    def finish(self) -> None:
+        hits = self.highlight_hits.value
+        misses = self.highlight_misses.value
+        if hits or misses:
+            logger.info('highlight cache: %d hits, %d misses', hits, misses)
+            self.highlight_cache.evict()
+
+        super().finish()
+        self.write_page_configs()
+
+        if self.config.revealjs_bundle:
+            self.write_bundles()
+
+        if self.config.revealjs_single_file:
+            self.inline_pages()
+
+        if self.config.revealjs_precompress:
+            self.precompress_output()
+
+        if self.profiler.enabled:
+            self.write_profile()
+
+    def write_bundles(self) -> None:
+        """Write the bundles used by the pages under content-hashed names.
+
+        The bundles of all pages (including pages written by previous builds)
+        are rebuilt from the final static files. Pages are updated to
+        reference the current names, unused bundles are removed.
+        """
+        with self.profiler.phase('bundle'):
+            specs_file = path.join(self.doctreedir, 'revealit_bundles.json')
+            specs = {}
+            if path.isfile(specs_file):
+                with open(specs_file, encoding='utf-8') as f:
+                    specs = json.load(f)
+            specs.update(self.bundles)
+
+            pages = {}
+            used = set()
+            for docname in sorted(self.env.found_docs):
+                fpath = self.get_outfilename(docname)
+                if path.isfile(fpath):
+                    with open(fpath, encoding='utf-8') as f:
+                        pages[fpath] = f.read()
+                    used.update(bundle.BUNDLE_REF_RE.findall(pages[fpath]))
+
+            bundle_dir = path.join(self.outdir, bundle.BUNDLE_DIR)
+            os.makedirs(bundle_dir, exist_ok=True)
+            names = self.write_bundle_files(bundle_dir, sorted(used), specs)
+
+            def replace(match):
+                name = names.get((match.group(1), match.group(2)))
+                return f'{bundle.BUNDLE_DIR}/{name}' if name else match.group()
+
+            for fpath, text in pages.items():
+                updated = bundle.BUNDLE_REF_RE.sub(replace, text)
+                if updated != text:
+                    with open(fpath, 'w', encoding='utf-8') as f:
+                        f.write(updated)
+
+            kept = set(names.values())
+            for filename in os.listdir(bundle_dir):
+                # Keep the precompressed siblings of kept bundles
+                base, ext = path.splitext(filename)
+                if ext in compress.SUFFIXES.values() and base in kept:
+                    continue
+                if filename not in kept:
+                    os.remove(path.join(bundle_dir, filename))
+
+            with open(specs_file, 'w', encoding='utf-8') as f:
+                json.dump({key: specs[key] for key, _ in used if key in specs}, f,
+                          indent=2, sort_keys=True)
+            logger.info('%d bundles for %d pages', len(names), len(pages))
+
+    def write_bundle_files(self, bundle_dir: str, used: List[Tuple[str, str]],
+                           specs: Dict[str, List[str]]) -> Dict[Tuple[str, str], str]:
+        """Write the given bundles, return their content-hashed filenames."""
+        writers = {'css': bundle.bundle_stylesheets, 'js': bundle.bundle_scripts}
+        names = {}
+        for key, ext in status_iterator(used, 'writing bundles... ', 'brown',
+                                        len(used), self.app.verbosity,
+                                        stringify_func=' '.join):
+            if key not in specs:
+                logger.warning('unknown bundle %s.%s, rebuild all pages (-a)', key, ext)
+                continue
+            data = writers[ext](self.outdir, specs[key])
+            names[key, ext] = bundle.hashed_name(key, ext, data)
+            fpath = path.join(bundle_dir, names[key, ext])
+            if not path.isfile(fpath):
+                with open(fpath, 'wb') as f:
+                    f.write(data)
+        return names
+
+    def inline_pages(self) -> None:
+        """Embed stylesheets, scripts, fonts and images into the written pages.
+
+        Runs after all static files are copied (and purged or minified),
+        every page becomes a self-contained HTML file.
+        """
+        with self.profiler.phase('inline'):
+            inliner = AssetInliner(self.outdir)
+            pages = sorted(self.env.found_docs)
+            for docname in status_iterator(pages, 'inlining assets... ', 'darkgreen',
+                                           len(pages), self.app.verbosity):
+                fpath = self.get_outfilename(docname)
+                if path.isfile(fpath):
+                    inliner.inline_page(fpath)
+
+    def precompress_output(self) -> None:
+        """Write compressed siblings (.gz, .br) of the text files in the output.
+
+        Files are only compressed if their content changed since the last
+        build (or a sibling is missing). Compression runs in a thread pool,
+        zlib and brotli release the GIL while compressing.
+        """
+        with self.profiler.phase('compress'):
+            formats = self.get_precompress_formats()
+
+            manifest_file = path.join(self.doctreedir, 'revealit_compress.json')
+            manifest = {}
+            if path.isfile(manifest_file):
+                with open(manifest_file, encoding='utf-8') as f:
+                    manifest = json.load(f)
+
+            current, targets = self.find_compress_targets(manifest, formats)
+
+            for rel in set(manifest) - set(current):
+                compress.remove_siblings(path.join(self.outdir, rel))
+
+            def compress_file(rel):
+                return compress.compress_file(path.join(self.outdir, rel), formats)
+
+            with ThreadPoolExecutor() as executor:
+                results = executor.map(compress_file, targets)
+                for rel, sizes in zip(targets, status_iterator(
+                        results, 'compressing files... ', 'brown', len(targets),
+                        self.app.verbosity, stringify_func=lambda _: '')):
+                    current[rel][1] = sorted(sizes)
+
+            with open(manifest_file, 'w', encoding='utf-8') as f:
+                json.dump(current, f, indent=2, sort_keys=True)
+            logger.info('compressed %d files (%d unchanged)',
+                        len(targets), len(current) - len(targets))
+
+    def get_precompress_formats(self) -> List[str]:
+        """Return the configured compression formats which can be written."""
+        configured = self.config.revealjs_precompress
+        for fmt in configured:
+            if fmt not in compress.COMPRESSORS:
+                logger.warning('unknown revealjs_precompress format %r, '
+                               'use one of %s', fmt, ', '.join(compress.COMPRESSORS))
+        formats = compress.available_formats(configured)
+        if 'br' in configured and 'br' not in formats:
+            logger.warning('brotli is not installed, no .br files are written')
+        return formats
+
+    def find_compress_targets(self, manifest: Dict[str, list], formats: List[str]
+                              ) -> Tuple[Dict[str, list], List[str]]:
+        """Return the manifest of the current text files and those to compress.
+
+        The manifest maps relative paths to their digest and written formats.
+        """
+        current = {}
+        targets = []
+        doctreedir = path.abspath(self.doctreedir)
+        for root, dirs, filenames in os.walk(self.outdir):
+            dirs[:] = [d for d in dirs
+                       if path.abspath(path.join(root, d)) != doctreedir]
+            for filename in filenames:
+                if path.splitext(filename)[1] not in compress.TEXT_EXTENSIONS:
+                    continue
+                fpath = path.join(root, filename)
+                rel = path.relpath(fpath, self.outdir)
+                with open(fpath, 'rb') as f:
+                    key = digest(f.read(), *formats)
+                known = manifest.get(rel)
+                suffixes = [compress.SUFFIXES[fmt] for fmt in known[1]] if known else []
+                if known and known[0] == key and all(
+                        path.isfile(fpath + suffix) for suffix in suffixes):
+                    current[rel] = known
+                else:
+                    current[rel] = [key, []]
+                    targets.append(rel)
+        targets.sort()
+        return current, targets
+
+    def write_profile(self) -> None:
+        """Write the profiling report and log a summary.
+
+        The report is passed to handlers of the ``revealjs-profile`` event,
+        to forward the numbers elsewhere.
+        """
+        self.profiler.merge_workers()
+        report = self.profiler.report()
+
+        report_file = path.join(self.outdir, 'revealjs_profile.json')
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+        logger.info(bold('profile:'))
+        logger.info(self.profiler.summary())
+        self.app.emit('revealjs-profile', report)
+
     @staticmethod
     def _get_builtin_file_path(d, f):
         f = files('sphinx_revealit.res').joinpath(d).joinpath(f)
@@ -207,27 +990,229 @@ class RevealjsHTMLBuilder(StandaloneHTMLBuilder):
     def get_builtin_plugin_path(name: str):
         return RevealjsHTMLBuilder._get_builtin_file_path('plugin', name + '.js')
 
+    def copy_theme_static_files(self, context: Dict) -> None:
+        if self.theme:
+            for entry in self.theme.get_theme_dirs()[::-1]:
+                self.collect_static_files(path.join(entry, 'static'), DOTFILES, context)
+
+    def copy_html_static_files(self, context: Dict) -> None:
+        excluded = Matcher(self.config.exclude_patterns + ['**/.*'])
+        for entry in self.config.html_static_path:
+            self.collect_static_files(path.join(self.confdir, entry), excluded, context)
+
+    def collect_static_files(self, source: str, excluded: Callable[[str], bool],
+                             context: Dict) -> None:
+        """Register a static directory (or file) for :meth:`sync_static_files`.
+
+        Like :func:`sphinx.util.fileutil.copy_asset`, templates (``*_t``)
+        are rendered right away.
+        """
+        static_dir = path.join(self.outdir, '_static')
+        if path.isfile(source):
+            entries = [(source, path.basename(source))]
+        else:
+            entries = []
+            for root, dirs, filenames in os.walk(source, followlinks=True):
+                reldir = relpath(root, source)
+                dirs[:] = [d for d in dirs if not excluded(posixpath.join(reldir, d))]
+                entries.extend((path.join(root, f), path.join(reldir, f))
+                               for f in filenames
+                               if not excluded(posixpath.join(reldir, f)))
+
+        for src, rel in entries:
+            dest = path.normpath(path.join(static_dir, rel))
+            if src.lower().endswith('_t'):
+                ensuredir(path.dirname(dest))
+                with open(src, encoding='utf-8') as f:
+                    rendered = self.templates.render_string(f.read(), context)
+                tmp = dest[:-2] + '.tmp'
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    f.write(rendered)
+                os.replace(tmp, dest[:-2])
+                self.static_files.pop(dest[:-2], None)
+            else:
+                self.static_files[dest] = src
+
+    def sync_static_files(self) -> None:
+        """Copy the registered static files, skipping unchanged files.
+
+        Package resources are hardlinked or reflinked with
+        ``revealjs_static_link``, files are copied in a thread pool.
+        """
+        mode = self.config.revealjs_static_link
+        targets = []
+        for dest, src in sorted(self.static_files.items()):
+            ensuredir(path.dirname(dest))
+            src = str(src)
+            own = path.abspath(src).startswith(PACKAGE_DIR + os.sep)
+            targets.append((src, dest, mode if own else 'copy'))
+
+        with progress_message('synchronizing static files'):
+            written, unchanged = staticsync.sync_files(targets)
+        logger.info('static files: %d copied, %d unchanged', written, unchanged)
+        self.static_files = {}
+
     def copy_static_files(self) -> None:
-        super().copy_static_files()
+        with self.profiler.phase('copy_static_files'):
+            self.static_files = {}
+            super().copy_static_files()
 
-        for f in status_iterator(self.builtin_files, 'copying builtin files', 'brown',
-                                 len(self.builtin_files), self.app.verbosity,
-                                 stringify_func=path.basename):
-            shutil.copyfile(f, path.join(self.outdir, '_static', path.basename(f)))
+            static_dir = path.join(self.outdir, '_static')
+            for f in self.builtin_files:
+                self.static_files[path.join(static_dir, path.basename(f))] = f
 
-        if self.config.revealjs_use_tailwind:
-            src = files('sphinx_revealit.res').joinpath('tailwind.css')
-            dest = path.join(self.outdir, '_static', 'tailwind.css')
+            tailwind = files('sphinx_revealit.res').joinpath('tailwind.css')
+            use_tailwind = self.config.revealjs_use_tailwind
+            purge_tailwind = use_tailwind and self.config.revealjs_purge_tailwind
+            if use_tailwind and not purge_tailwind:
+                self.static_files[path.join(static_dir, 'tailwind.css')] = tailwind
 
-            if self.config.revealjs_purge_tailwind:
+            try:
+                self.sync_static_files()
+            except OSError as err:
+                logger.warning('cannot copy static file %r', err)
+
+            self.write_font_files()
+
+            if purge_tailwind:
                 with progress_message('purging tailwind.css'):
-                    whitelist = set()
+                    whitelist = CSSClassCollector.get_classes(self.app.env)
+                    self.purge_css_file(tailwind, path.join(static_dir, 'tailwind.css'),
+                                        whitelist)
+
+            if self.config.revealjs_purge_css:
+                self.purge_static_css()
+
+            if self.config.revealjs_minify:
+                self.minify_static_files()
+
+    def get_page_classes(self) -> Set[str]:
+        """Return all classes used in the written pages."""
+        classes = set()
+        for docname in self.env.found_docs:
+            fpath = self.get_outfilename(docname)
+            if path.isfile(fpath):
+                with open(fpath, encoding='utf-8') as f:
+                    classes.update(CSSPurge.classes_from_html(f.read()))
+        return classes
 
-                    if hasattr(self.app.env, 'rjs_css_classes'):
-                        whitelist = self.app.env.rjs_css_classes
+    def purge_static_css(self) -> None:
+        """Purge the stylesheets in the output directory against the pages.
 
-                    purge = CSSPurge.from_file(src)
-                    purge.purge_to_file(whitelist, dest)
+        This covers reveal.css, the themes, pygments.css, sphinx_revealit.css
+        and custom stylesheets. Rules not depending on classes are kept.
+        """
+        whitelist = self.get_page_classes()
+        whitelist.update(REVEALJS_RUNTIME_CLASSES)
+        whitelist.update(self.config.revealjs_purge_safelist)
+
+        stylesheets = []
+        css_files = [str(css) for css in self.css_files] + sorted(self.deck_css_files)
+        for filename in css_files:
+            if filename in stylesheets or filename == '_static/tailwind.css':
+                continue
+            if not is_local(filename):
+                continue
+            if path.isfile(path.join(self.outdir, filename)):
+                stylesheets.append(filename)
+
+        for filename in status_iterator(stylesheets, 'purging stylesheets... ', 'brown',
+                                        len(stylesheets), self.app.verbosity):
+            fpath = path.join(self.outdir, filename)
+            self.purge_css_file(fpath, fpath, whitelist, keep_unscoped=True)
+
+    def purge_css_file(self, src, dest: str, whitelist: Set[str],
+                       keep_unscoped: bool = False) -> None:
+        """Purge a stylesheet, reusing the cached result of an identical purge.
+
+        On a cache miss, the class index of the stylesheet is loaded from the
+        cache (or built and stored), so the stylesheet is parsed once only.
+        ``src`` and ``dest`` may be the same file.
+        """
+        with self.profiler.phase('purge'):
+            tmp = dest + '.tmp'
+
+            purge = CSSPurge.from_file(src)
+            key = digest(str(CSSPurge.version), purge.buffer,
+                         whitelist_digest(whitelist), str(keep_unscoped))
+            cached = self.purge_cache.get(key)
+            if cached:
+                shutil.copyfile(cached, tmp)
+                os.replace(tmp, dest)
+                return
+
+            index_key = digest('index', str(CSSIndex.version), purge.buffer)
+            index_file = self.purge_cache.get(index_key)
+            index = CSSIndex.load(index_file) if index_file else None
+
+            if index is None:
+                self.purge_cache.put(index_key, purge.index.dumps())
             else:
-                with progress_message('copying tailwind.css'):
-                    shutil.copyfile(src, dest)
+                purge.index = index
+
+            purge.purge_to_file(whitelist, tmp, keep_unscoped)
+            self.purge_cache.put_file(key, tmp)
+            os.replace(tmp, dest)
+
+    def minify_static_files(self) -> None:
+        """Minify all stylesheets and scripts in the static output directory."""
+        with self.profiler.phase('minify'):
+            minifiers = {'.css': minify.minify_css, '.js': minify.minify_js}
+            static_dir = path.join(self.outdir, '_static')
+
+            targets = []
+            for root, _, filenames in os.walk(static_dir):
+                for filename in filenames:
+                    if path.splitext(filename)[1] in minifiers:
+                        fpath = path.join(root, filename)
+                        targets.append(path.relpath(fpath, static_dir))
+            targets.sort()
+
+            saved = []
+            for filename in status_iterator(targets, 'minifying static files... ',
+                                            'brown', len(targets), self.app.verbosity):
+                fpath = path.join(static_dir, filename)
+                with open(fpath, 'rb') as f:
+                    data = f.read()
+
+                minify_func = minifiers[path.splitext(filename)[1]]
+                minified = self.minify_data(filename, data, minify_func)
+                if minified is None or len(minified) >= len(data):
+                    # Not UTF-8 or minified already (escaped end tags would
+                    # only add bytes)
+                    continue
+
+                # Replace the file, it may be a hardlink to a package resource
+                with open(fpath + '.tmp', 'wb') as f:
+                    f.write(minified)
+                os.replace(fpath + '.tmp', fpath)
+                saved.append((filename, len(data), len(minified)))
+
+            for filename, before, after in saved:
+                logger.info('%s: %d -> %d bytes (%d saved)',
+                            filename, before, after, before - after)
+            if saved:
+                total = sum(before - after for _, before, after in saved)
+                logger.info('minified %d files, %d bytes saved', len(saved), total)
+
+    def minify_data(self, filename: str, data: bytes,
+                    minify_func: Callable[[str], str]) -> Optional[bytes]:
+        """Return the minified contents of a file, reusing previous results.
+
+        Returns None if the file is not UTF-8 encoded.
+        """
+        ext = path.splitext(filename)[1]
+        key = digest('minify', str(minify.version), ext, data)
+        cached = self.minify_cache.get(key)
+        if cached:
+            with open(cached, 'rb') as f:
+                return f.read()
+
+        try:
+            text = data.decode('utf-8')
+        except UnicodeDecodeError:
+            logger.warning('cannot minify %s: not UTF-8 encoded', filename)
+            return None
+        minified = minify_func(text).encode('utf-8')
+        self.minify_cache.put(key, minified)
+        return minified
@@ -0,0 +1,68 @@
+"""Bundling of static stylesheets and scripts.
+
+Consecutive local stylesheets (or scripts) of a page are concatenated into
+one bundle. Pages are rendered with a placeholder name per bundle, which is
+replaced by the content-hashed filename once the static files are final.
+"""
+import posixpath
+import re
+from os import path
+from typing import Iterable, List
+
+from sphinx_revealit.cache import digest
+from sphinx_revealit.inline import flatten_css, url_to_path
+
+BUNDLE_DIR = '_static/bundles'
+
+# Placeholders (<key>.bundle.<ext>) and hashed names (<key>.<hash>.<ext>)
+BUNDLE_REF_RE = re.compile(
+    r'_static/bundles/([0-9a-f]{16})\.(?:[0-9a-f]{16}|bundle)\.(css|js)\b')
+
+
+def bundle_key(files: Iterable[str]) -> str:
+    """Return the key of the bundle of the given files."""
+    return digest(*files)[:16]
+
+
+def placeholder(key: str, ext: str) -> str:
+    return f'{BUNDLE_DIR}/{key}.bundle.{ext}'
+
+
+def hashed_name(key: str, ext: str, data: bytes) -> str:
+    return f'{key}.{digest(data)[:16]}.{ext}'
+
+
+def _read_text(fpath: str) -> str:
+    with open(fpath, encoding='utf-8') as f:
+        return f.read()
+
+
+def bundle_stylesheets(outdir: str, files: List[str]) -> bytes:
+    """Concatenate stylesheets, flattening imports.
+
+    Relative URLs are rewritten to be relative to the bundle directory.
+    """
+    bundle_dir = path.join(outdir, BUNDLE_DIR)
+
+    def rewrite_url(url, base_dir):
+        target = url_to_path(url, base_dir)
+        rel = posixpath.join(*path.relpath(target, bundle_dir).split(path.sep))
+        # Keep queries and fragments, e.g. font.eot?#iefix
+        suffix = url[len(url.split('#', 1)[0].split('?', 1)[0]):]
+        return 'url("%s%s")' % (rel, suffix)
+
+    parts = [flatten_css(path.join(outdir, f), _read_text, rewrite_url) for f in files]
+    # Remote imports have to be moved to the start of the bundle
+    imports = []
+    for i, css in enumerate(parts):
+        match = re.match(r'(?:@import[^;]*;\s*)+', css)
+        if match:
+            imports.append(match.group())
+            parts[i] = css[match.end():]
+    return (''.join(imports) + '\n'.join(parts)).encode('utf-8')
+
+
+def bundle_scripts(outdir: str, files: List[str]) -> bytes:
+    """Concatenate scripts, separated by semicolons."""
+    parts = [_read_text(path.join(outdir, f)) for f in files]
+    return '\n;\n'.join(parts).encode('utf-8')
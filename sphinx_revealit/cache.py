@@ -0,0 +1,98 @@
+"""Persistent caches for build artifacts."""
+import hashlib
+import os
+import shutil
+import tempfile
+from os import path
+from typing import Iterable, Optional, Union
+
+
+def digest(*parts: Union[str, bytes, memoryview]) -> str:
+    """Return a hex digest over all given parts."""
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode('utf-8')
+        h.update(part)
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def whitelist_digest(whitelist: Iterable[str]) -> str:
+    """Return an order-independent digest of a class whitelist."""
+    return digest('\n'.join(sorted(whitelist)))
+
+
+class FileCache:
+    """Directory of cached files, bounded by their total size.
+
+    Every hit refreshes the entry's mtime, so eviction removes the least
+    recently used entries first.
+    """
+
+    def __init__(self, directory: str, max_size: int):  # noqa: D107
+        self.directory = directory
+        self.max_size = max_size
+
+    def _path(self, key: str) -> str:
+        return path.join(self.directory, key)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the path of the cached file or None."""
+        fpath = self._path(key)
+        try:
+            os.utime(fpath)
+        except OSError:
+            return None
+        return fpath
+
+    def put(self, key: str, data: bytes, evict: bool = True) -> str:
+        """Store data in the cache.
+
+        If ``evict`` is false, the size limit is not enforced until the next
+        call of :meth:`evict`, which is faster for many small entries.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        return self._commit(tmp, key, evict)
+
+    def put_file(self, key: str, src: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix='.tmp')
+        os.close(fd)
+        shutil.copyfile(src, tmp)
+        return self._commit(tmp, key)
+
+    def _commit(self, tmp: str, key: str, evict: bool = True) -> str:
+        fpath = self._path(key)
+        os.replace(tmp, fpath)
+        if evict:
+            self.evict()
+        return fpath
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the size limit is met."""
+        entries = []
+        total = 0
+        if not path.isdir(self.directory):
+            return
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.is_file() or entry.name.startswith('.tmp'):
+                    continue
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+
+        entries.sort()
+        # Always keep the newest entry, even if it exceeds the limit on its own
+        for _, size, fpath in entries[:-1]:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(fpath)
+            except OSError:
+                continue
+            total -= size
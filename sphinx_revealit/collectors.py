@@ -12,6 +12,8 @@ from sphinx.util import logging
 from sphinx_revealit.csspurge import CSSPurge
 from sphinx_revealit.elements import RjsElement
 from sphinx_revealit.nodes import RevealjsNode
+from sphinx_revealit.profiling import get_profiler
+from sphinx_revealit.transforms import get_document_deck
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +27,10 @@ class RevealjsImageCollector(EnvironmentCollector):
         env.images.merge_other(docnames, other.images)
 
     def process_doc(self, app: Sphinx, doctree: nodes.document) -> None:
+        with get_profiler(app).phase('image_collector', app.env.docname):
+            self._process_doc(app, doctree)
+
+    def _process_doc(self, app: Sphinx, doctree: nodes.document) -> None:
         docname = app.env.docname
         static_paths = app.builder.config['html_static_path']
 
@@ -53,27 +59,144 @@ class RevealjsImageCollector(EnvironmentCollector):
 
 
 class CSSClassCollector(EnvironmentCollector):
+    """Collect the CSS classes used by each document.
+
+    The classes are stored per docname in ``env.rjs_doc_css_classes``, so
+    re-reading a document only replaces its own classes.
+    """
+
+    @staticmethod
+    def get_classes(env: BuildEnvironment) -> Set[str]:
+        """Return the classes used by all documents."""
+        classes = set()
+        for doc_classes in getattr(env, 'rjs_doc_css_classes', {}).values():
+            classes.update(doc_classes)
+        return classes
+
     def clear_doc(self, app: Sphinx, env: BuildEnvironment, docname: str) -> None:
-        env.rjs_css_classes = set()
+        getattr(env, 'rjs_doc_css_classes', {}).pop(docname, None)
 
     def merge_other(self, app: Sphinx, env: BuildEnvironment,
                     docnames: Set[str], other: BuildEnvironment) -> None:
-        env.rjs_css_classes = getattr(env, 'rjs_css_classes', []) | getattr(other, 'rjs_css_classes', [])
+        if not hasattr(env, 'rjs_doc_css_classes'):
+            env.rjs_doc_css_classes = {}
+
+        other_classes = getattr(other, 'rjs_doc_css_classes', {})
+        for docname in docnames:
+            if docname in other_classes:
+                env.rjs_doc_css_classes[docname] = other_classes[docname]
 
     def process_doc(self, app: Sphinx, doctree: nodes.document) -> None:
-        if not hasattr(app.env, 'rjs_css_classes'):
-            app.env.rjs_css_classes = set()
+        with get_profiler(app).phase('css_class_collector', app.env.docname):
+            self._process_doc(app, doctree)
+
+    def _process_doc(self, app: Sphinx, doctree: nodes.document) -> None:
+        if not hasattr(app.env, 'rjs_doc_css_classes'):
+            app.env.rjs_doc_css_classes = {}
+
+        classes = set()
 
         for node in doctree.traverse():
             if hasattr(node, 'attributes') and node.attributes.get('classes'):
-                app.env.rjs_css_classes.update(node.attributes['classes'])
+                classes.update(node.attributes['classes'])
 
             if getattr(node, 'tagname', None) == 'raw' and node.attributes.get('format') == 'html':
-                app.env.rjs_css_classes.update(CSSPurge.classes_from_html(node.rawsource))
+                classes.update(CSSPurge.classes_from_html(node.rawsource))
 
             elm = getattr(node, 'revealit_el', None)
 
             if isinstance(elm, RjsElement):
-                app.env.rjs_css_classes.update(elm.classes)
+                classes.update(elm.classes)
+
+        app.env.rjs_doc_css_classes[app.env.docname] = classes
+
+
+class DeckCollector(EnvironmentCollector):
+    """Collect the deck options of each document.
+
+    Stored per docname in ``env.rjs_doc_decks`` as ``(options, content)``
+    of the ``rjs-deck`` directive, the builder compares the deck
+    configuration of pages without loading their doctrees.
+    """
+
+    def clear_doc(self, app: Sphinx, env: BuildEnvironment, docname: str) -> None:
+        getattr(env, 'rjs_doc_decks', {}).pop(docname, None)
+
+    def merge_other(self, app: Sphinx, env: BuildEnvironment,
+                    docnames: Set[str], other: BuildEnvironment) -> None:
+        if not hasattr(env, 'rjs_doc_decks'):
+            env.rjs_doc_decks = {}
 
-        pass
+        other_decks = getattr(other, 'rjs_doc_decks', {})
+        for docname in docnames:
+            if docname in other_decks:
+                env.rjs_doc_decks[docname] = other_decks[docname]
+
+    def process_doc(self, app: Sphinx, doctree: nodes.document) -> None:
+        with get_profiler(app).phase('deck_collector', app.env.docname):
+            self._process_doc(app, doctree)
+
+    def _process_doc(self, app: Sphinx, doctree: nodes.document) -> None:
+        if not hasattr(app.env, 'rjs_doc_decks'):
+            app.env.rjs_doc_decks = {}
+
+        deck = get_document_deck(doctree)
+        if deck is not None:
+            config = (deck.revealit_el.cdata, deck.content)
+        else:
+            config = ({}, '')
+        app.env.rjs_doc_decks[app.env.docname] = config
+
+
+class FontTextCollector(EnvironmentCollector):
+    """Collect the characters used by each document, to subset fonts.
+
+    Stored per docname in ``env.rjs_doc_font_text`` as dict with the
+    characters of all text (``text``), of literals (``code``) and whether
+    the first slide contains literals (``first_code``).
+    """
+
+    def clear_doc(self, app: Sphinx, env: BuildEnvironment, docname: str) -> None:
+        getattr(env, 'rjs_doc_font_text', {}).pop(docname, None)
+
+    def merge_other(self, app: Sphinx, env: BuildEnvironment,
+                    docnames: Set[str], other: BuildEnvironment) -> None:
+        if not hasattr(env, 'rjs_doc_font_text'):
+            env.rjs_doc_font_text = {}
+
+        other_text = getattr(other, 'rjs_doc_font_text', {})
+        for docname in docnames:
+            if docname in other_text:
+                env.rjs_doc_font_text[docname] = other_text[docname]
+
+    def process_doc(self, app: Sphinx, doctree: nodes.document) -> None:
+        with get_profiler(app).phase('font_text_collector', app.env.docname):
+            self._process_doc(app, doctree)
+
+    def _process_doc(self, app: Sphinx, doctree: nodes.document) -> None:
+        if not hasattr(app.env, 'rjs_doc_font_text'):
+            app.env.rjs_doc_font_text = {}
+
+        code = set()
+        literals = (nodes.literal, nodes.literal_block)
+        for node in doctree.traverse(lambda n: isinstance(n, literals)):
+            code.update(node.astext())
+
+        # Whether the first slide (without nested slides) contains literals
+        first_code = False
+        for section in doctree.traverse(nodes.section):
+            section_literals = section.traverse(lambda n: isinstance(n, literals))
+            first_code = any(_section_of(n) is section for n in section_literals)
+            break
+
+        app.env.rjs_doc_font_text[app.env.docname] = {
+            'text': ''.join(sorted(set(doctree.astext()))),
+            'code': ''.join(sorted(code)),
+            'first_code': first_code,
+        }
+
+
+def _section_of(node: nodes.Node) -> nodes.Node:
+    while node is not None and not isinstance(node, nodes.section):
+        node = node.parent
+    return node
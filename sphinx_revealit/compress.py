@@ -0,0 +1,70 @@
+"""Precompressed (gzip, brotli) variants of output files."""
+import gzip
+import io
+import os
+from os import path
+from typing import Dict, List
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# Files compressed by default, other formats (images, fonts) are compressed already
+TEXT_EXTENSIONS = frozenset((
+    '.html', '.css', '.js', '.json', '.svg', '.txt', '.xml', '.map',
+))
+
+SUFFIXES = {'gzip': '.gz', 'br': '.br'}
+
+
+def gzip_compress(data: bytes) -> bytes:
+    """Compress data, without a timestamp in the header (reproducible output)."""
+    buffer = io.BytesIO()
+    with gzip.GzipFile(filename='', mode='wb', fileobj=buffer,
+                       compresslevel=9, mtime=0) as f:
+        f.write(data)
+    return buffer.getvalue()
+
+
+def brotli_compress(data: bytes) -> bytes:
+    return brotli.compress(data, quality=11)
+
+
+COMPRESSORS = {'gzip': gzip_compress, 'br': brotli_compress}
+
+
+def available_formats(formats: List[str]) -> List[str]:
+    """Return the known formats which can be written, brotli is optional."""
+    return [fmt for fmt in formats
+            if fmt in COMPRESSORS and (fmt != 'br' or brotli is not None)]
+
+
+def compress_file(fpath: str, formats: List[str]) -> Dict[str, int]:
+    """Write compressed siblings of a file and return their sizes.
+
+    Siblings not smaller than the file are removed, the server would send
+    the file itself anyway.
+    """
+    with open(fpath, 'rb') as f:
+        data = f.read()
+
+    sizes = {}
+    for fmt in formats:
+        dest = fpath + SUFFIXES[fmt]
+        compressed = COMPRESSORS[fmt](data)
+        if len(compressed) < len(data):
+            tmp = dest + '.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(compressed)
+            os.replace(tmp, dest)
+            sizes[fmt] = len(compressed)
+        elif path.isfile(dest):
+            os.remove(dest)
+    return sizes
+
+
+def remove_siblings(fpath: str) -> None:
+    for suffix in SUFFIXES.values():
+        if path.isfile(fpath + suffix):
+            os.remove(fpath + suffix)
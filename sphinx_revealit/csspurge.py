@@ -1,131 +1,654 @@
+import pickle
 import re
-from typing import List, Set, Iterable, Tuple
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+# Everything the tokenizer has to stop at: comment openers, quoted strings
+# (which may contain braces) and block delimiters. Matches on the raw bytes.
+_TOKEN_RE = re.compile(
+    rb'/\*|"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|[{}]', re.S)
+_COMMENT_RE = re.compile(r'/\*(.*?)(?:\*/|\Z)', re.S)
+_SELECTOR_RE = re.compile(r'([^{]+){')
+# Selector tokens: strings, attribute selectors, class names (with CSS
+# escapes), other escaped characters, parentheses and commas
+_SELECTOR_TOKEN_RE = re.compile(
+    r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\''
+    r'|\[(?:[^\]"\'\\]|\\.|"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')*\]'
+    r'|\.((?:[\w-]|[^\x00-\x7f]|\\[0-9a-fA-F]{1,6}\s?|\\[^\n\r\f0-9a-fA-F])+)'
+    r'|\\.|[(),]', re.S)
+# Selectors without any of these characters are parsed with a simple regex
+_COMPLEX_SELECTOR_RE = re.compile(r'[\\,()\[\]"\'\x80-\U0010ffff]')
+_SIMPLE_CLASS_RE = re.compile(r'\.([\w-]+)')
+_ESCAPE_RE = re.compile(r'\\(?:([0-9a-fA-F]{1,6})\s?|(.))', re.S)
+_HTML_CLASS_RE = re.compile(r'class\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+_AT_RULE_RE = re.compile(r'@([\w-]+)')
+_ANIMATION_RE = re.compile(r'animation(?:-name)?\s*:\s*([^;}]+)')
+_FONT_RE = re.compile(r'font(?:-family)?\s*:\s*([^;}]+)')
+_FONT_FAMILY_RE = re.compile(r'font-family\s*:\s*([^;}]+)')
+
+# At-rules containing a list of rules, these are purged recursively
+GROUP_AT_RULES = {
+    'media', 'supports', 'document', '-moz-document', 'layer', 'container',
+}
+
+
+def _unescape(ident: str) -> str:
+    if '\\' not in ident:
+        return ident
+    return _ESCAPE_RE.sub(
+        lambda m: chr(int(m.group(1), 16)) if m.group(1) else m.group(2), ident)
+
+
+def _parse_selectors(sels: str) -> List[Tuple[str, Tuple[str, ...]]]:
+    """Split a selector list and find the classes each selector requires.
+
+    Class names are unescaped (``.md\\:flex`` requires ``md:flex``).
+    Classes in functional pseudo-classes like ``:not()`` or ``:is()`` are not
+    required for the selector to match, so they are ignored.
+    Returns a (selector text, classes) tuple for every selector.
+    """
+    if not _COMPLEX_SELECTOR_RE.search(sels):
+        return [(sels, tuple(dict.fromkeys(_SIMPLE_CLASS_RE.findall(sels))))]
+
+    selectors = []
+    classes = []
+    depth = 0
+    start = 0
+
+    for match in _SELECTOR_TOKEN_RE.finditer(sels):
+        token = match.group()
+        if match.group(1) is not None:
+            if depth == 0:
+                classes.append(_unescape(match.group(1)))
+        elif token == '(':
+            depth += 1
+        elif token == ')':
+            depth = max(depth - 1, 0)
+        elif token == ',' and depth == 0:
+            selector = sels[start:match.start()]
+            selectors.append((selector, tuple(dict.fromkeys(classes))))
+            classes = []
+            start = match.end()
+
+    selectors.append((sels[start:], tuple(dict.fromkeys(classes))))
+    return selectors
+
+
+def _selector_matches(classes: Tuple[str, ...], whitelist) -> bool:
+    return bool(classes) and all(c in whitelist for c in classes)
+
+
+# Rule spans, parents, group header ends, statements, comment spans, copyright
+Tokens = Tuple[array, array, Dict[int, int], array, array, str]
 
 
 class CSSRule:
+    __slots__ = ('css', 'selectors', 'classes')
+
     def __init__(self, css: str):
         self.css = css
-        self.classes = set()
+        self.selectors = []
 
-        match = re.search(r'([^{]+){', self.css)
+        match = _SELECTOR_RE.search(self.css)
         if match:
-            sels = match.group(1)
-            self.classes.update(re.findall(r'\.\\?([\w\d\-_]+)', sels))
+            self.selectors = _parse_selectors(match.group(1))
+        self.classes = {c for _, classes in self.selectors for c in classes}
 
     def matches_whitelist(self, whitelist: Iterable):
-        for cls in self.classes:
-            if cls in whitelist:
-                return True
-        return False
+        """Check if any selector has all of its classes in the whitelist."""
+        return any(_selector_matches(classes, whitelist)
+                   for _, classes in self.selectors)
+
+    def purged_css(self, whitelist: Iterable) -> str:
+        """Return the rule with all selectors removed whose classes are not used.
+
+        Selectors without any classes are kept.
+        """
+        keep = [not classes or _selector_matches(classes, whitelist)
+                for _, classes in self.selectors]
+        if all(keep):
+            return self.css
+        return _prune_selectors(self.css, keep)
 
     def __str__(self):
         return self.css
 
 
-class CSSPurge:
-    def __init__(self, css: str):
-        no_comments, cright = self.filter_comments(css)
-        self.css_rules = self._parse(no_comments)
+def _prune_selectors(css: str, keep: List[bool]) -> str:
+    head, brace, body = css.partition('{')
+    sels = head.lstrip()
+    kept = [sel for (sel, _), k in zip(_parse_selectors(sels), keep) if k]
+    return head[:len(head) - len(sels)] + ','.join(kept) + brace + body
+
+
+def _is_at_rule(header: bytes) -> bool:
+    return _COMMENT_RE.sub('', header.decode('utf-8')).lstrip()[:1] == '@'
+
+
+def _is_group_at_rule(header: bytes) -> bool:
+    if b'@' not in header:
+        return False
+    at_rule = _AT_RULE_RE.match(_COMMENT_RE.sub('', header.decode('utf-8')).lstrip())
+    return bool(at_rule) and at_rule.group(1).lower() in GROUP_AT_RULES
+
+
+def _unquote(name: str) -> str:
+    return name.strip().strip('"\'').strip()
+
+
+class CSSIndex:
+    """Inverted index from class names to the rules referencing them.
+
+    Rules are stored in document order as byte spans over the source
+    stylesheet, so an index loaded from disk can purge the stylesheet without
+    parsing it again. Group at-rules (``@media``, ``@supports``...) are nodes,
+    too; the rules inside them point to them as their parent.
+    """
+
+    # Bump when the serialized format changes
+    version = 4
+
+    def __init__(self, cright: str, spans: array, parents: array,
+                 heads: Dict[int, int], always: array, comments: array,
+                 classes: Dict[str, Union[int, array]], requires: Dict[int, tuple],
+                 unscoped: array, named: Dict[str, array],
+                 refs: Dict[int, Tuple[str, ...]]):  # noqa: D107
         self.cright = cright
+        # Flat start/end offsets: rule i spans spans[2 * i]:spans[2 * i + 1]
+        self.spans = spans
+        # Offset of the enclosing group at-rule, -1 for top-level rules
+        self.parents = parents
+        # Group at-rule offset -> end offset of its header (after the opening
+        # bracket)
+        self.heads = heads
+        # Offsets of statement at-rules (@import, @charset...), which are
+        # always kept
+        self.always = always
+        # Flat start/end offsets of comments, cut out when slicing rules
+        self.comments = comments
+        self._comment_starts = comments[::2]
+        # Class name -> offset of the rule using it, or an array of offsets
+        # if several rules use it (most classes are used by a single rule)
+        self.classes = classes
+        # Rule offset -> classes required by each of its selectors. Omitted
+        # for rules with a single selector using a single class.
+        self.requires = requires
+        # Offsets of rules that do not depend on classes: style rules with a
+        # selector not using any classes and at-rules like @page
+        self.unscoped = unscoped
+        # '@keyframes name' / '@font-face family' -> offsets of these at-rules
+        self.named = named
+        # Rule offset -> named at-rules it uses
+        self.refs = refs
 
     @classmethod
-    def from_file(cls, css_file):
-        with open(css_file, 'r', encoding='utf-8') as f:
-            css = f.read()
-        return cls(css)
+    def from_css(cls, css: Union[str, bytes]) -> 'CSSIndex':
+        if isinstance(css, str):
+            css = css.encode('utf-8')
+        spans, parents, heads, always, comments, cright = CSSPurge._tokenize(css)
+        index = cls(cright, spans, parents, heads, always, comments,
+                    {}, {}, array('I'), {}, {})
+        statements = set(always)
+        # Share class name strings, so they are stored once when pickled
+        names = {}
+        # Rules which may reference @keyframes or @font-face rules
+        animations = {}
+        fonts = {}
 
-    @staticmethod
-    def filter_comments(css: str) -> Tuple[str, str]:
-        output = ''
-        cright = ''
-        state = 0
-        first_comment = True
-
-        for c in css:
-            if state < 2:
-                output += c
-            elif first_comment:
-                cright += c
-
-            # Initial state, searching for comment
-            if state == 0 and c == '/':
-                state = 1
-            elif state == 1:
-                if c == '*':
-                    state = 2
-                    output = output[:-2]
-                else:
-                    state = 0
-            # Comment block opened, discarding comment text
-            elif state == 2 and c == '*':
-                state = 3
-            elif state == 3:
-                if c == '/':
-                    state = 0
-                    first_comment = False
-                else:
-                    state = 2
-
-        return output, cright[:-2].strip()
+        for i in range(len(index)):
+            if i in heads or i in statements:
+                continue
 
-    @staticmethod
-    def _parse(css: str) -> List[CSSRule]:
-        in_comment = False
-        bracket_level = 0
-        # When 2 chars were parsed (open/close comment), dont parse the second char again
-        dont_parse_next = False
-        cur_rule = ''
-        rules = []
-
-        for i, c in enumerate(css):
-            if (i + 1) < len(css):
-                nc = css[i + 1]
+            text = index.rule_css(css, i)
+            if text.lstrip().startswith('@'):
+                index._add_at_rule(i, text.lstrip())
+                continue
+
+            index._add_style_rule(i, CSSRule(text), names)
+            if 'animation' in text:
+                animations[i] = text
+            if 'font' in text:
+                fonts[i] = text
+
+        index._add_refs(animations, fonts)
+        return index
+
+    def _add_at_rule(self, i: int, text: str):
+        name = self._at_rule_name(text)
+        if name:
+            self.named.setdefault(name, array('I')).append(i)
+        else:
+            # Other at-rules (@page...) do not depend on classes
+            self.unscoped.append(i)
+
+    def _add_style_rule(self, i: int, rule: CSSRule, names: Dict[str, str]):
+        for c in rule.classes:
+            hits = self.classes.get(c)
+            if hits is None:
+                self.classes[c] = i
+            elif isinstance(hits, int):
+                self.classes[c] = array('I', (hits, i))
             else:
-                nc = ''
+                hits.append(i)
+
+        requires = tuple(tuple(names.setdefault(c, c) for c in classes)
+                         for _, classes in rule.selectors)
+        if rule.classes and (len(requires) > 1 or len(requires[0]) > 1):
+            self.requires[i] = requires
+        if not all(requires):
+            self.unscoped.append(i)
+
+    def _add_refs(self, animations: Dict[int, str], fonts: Dict[int, str]):
+        """Find the @keyframes and @font-face rules used by the given rules."""
+        keyframes = {n[11:] for n in self.named if n.startswith('@keyframes ')}
+        families = {n[11:] for n in self.named if n.startswith('@font-face ')}
+        refs = {}
 
-            cur_rule += c
+        for i, text in animations.items():
+            for decl in _ANIMATION_RE.findall(text):
+                for token in re.split(r'[\s,]+', decl):
+                    if token in keyframes:
+                        refs.setdefault(i, set()).add('@keyframes ' + token)
 
-            if dont_parse_next:
-                dont_parse_next = False
-            elif in_comment:
-                if c == '*' and nc == '/':
-                    in_comment = False
-                    dont_parse_next = True
+        for i, text in fonts.items():
+            for decl in _FONT_RE.findall(text):
+                for family in decl.split(','):
+                    family = _unquote(family).lower()
+                    for known in families:
+                        if family.endswith(known):
+                            refs.setdefault(i, set()).add('@font-face ' + known)
+
+        self.refs = {i: tuple(sorted(names)) for i, names in refs.items()}
+
+    @staticmethod
+    def _at_rule_name(text: str) -> Optional[str]:
+        """Return the name other rules can reference an at-rule by."""
+        at_rule = _AT_RULE_RE.match(text)
+        if at_rule.group(1).endswith('keyframes'):
+            return '@keyframes ' + text[at_rule.end():text.find('{')].strip()
+        if at_rule.group(1) == 'font-face':
+            family = _FONT_FAMILY_RE.search(text)
+            if family:
+                return '@font-face ' + _unquote(family.group(1)).lower()
+        return None
+
+    def __len__(self):
+        return len(self.spans) // 2
+
+    def banners(self, css: bytes) -> Iterator[Tuple[int, int]]:
+        """Yield the spans of the comments kept in purged stylesheets.
+
+        These are the first comment (the copyright banner) and all license
+        comments (``/*! ... */``), which minifiers keep as well.
+        """
+        for j in range(0, len(self.comments), 2):
+            start, end = self.comments[j], self.comments[j + 1]
+            if css[end - 2:end] != b'*/' or end - start < 4:
+                # Not closed
+                continue
+            if j == 0 and self.cright:
+                yield start, end
+            elif css[start:start + 3] == b'/*!' and css[start + 3:end - 2].strip():
+                # Tailwind uses empty /*!*/ comments in declarations
+                yield start, end
+
+    def pieces(self, start: int, end: int) -> Iterator[Tuple[int, int]]:
+        """Yield the spans between the given offsets that are not comments."""
+        starts = self._comment_starts
+        j = bisect_left(starts, start)
+        while j < len(starts) and starts[j] < end:
+            yield start, starts[j]
+            start = self.comments[2 * j + 1]
+            j += 1
+        yield start, end
+
+    def rule_css(self, css: bytes, i: int) -> str:
+        start, end = self.spans[2 * i], self.spans[2 * i + 1]
+        pieces = [css[a:b] for a, b in self.pieces(start, end)]
+        return b''.join(pieces).decode('utf-8')
+
+    def rule_head(self, css: bytes, i: int) -> str:
+        """Return the header of a group at-rule, including the opening bracket."""
+        pieces = [css[a:b] for a, b in self.pieces(self.spans[2 * i], self.heads[i])]
+        return b''.join(pieces).decode('utf-8')
+
+    def ancestors(self, i: int) -> List[int]:
+        """Return the group at-rules enclosing a rule, outermost first."""
+        chain = []
+        parent = self.parents[i]
+        while parent != -1:
+            chain.append(parent)
+            parent = self.parents[parent]
+        chain.reverse()
+        return chain
+
+    def candidates(self, whitelist: Iterable, keep_unscoped: bool = False) -> Set[int]:
+        """Return the offsets of all rules which may match the whitelist."""
+        candidates = set(self.always)
+        if keep_unscoped:
+            candidates.update(self.unscoped)
+        for c in whitelist:
+            hits = self.classes.get(c)
+            if hits is None:
+                continue
+            if isinstance(hits, int):
+                candidates.add(hits)
             else:
-                if c == '/' and nc == '*':
-                    in_comment = True
-                    dont_parse_next = True
+                candidates.update(hits)
+        return candidates
+
+    def select(self, whitelist: Iterable,
+               keep_unscoped: bool = False) -> Tuple[List[int], Dict[int, List[bool]]]:
+        """Return the offsets of all rules matching the whitelist, in order.
+
+        A rule matches if one of its selectors has all of its classes in the
+        whitelist or, with ``keep_unscoped``, uses no classes at all.
+        ``@keyframes`` and ``@font-face`` rules are included if a matching
+        rule uses them, statement at-rules like ``@import`` are always included.
+        Also returns, for rules of which only some selectors match, which
+        selectors to keep.
+        """
+        if not isinstance(whitelist, (set, frozenset, dict)):
+            whitelist = set(whitelist)
+
+        offsets = set()
+        pruned = {}
+        for i in self.candidates(whitelist, keep_unscoped):
+            requires = self.requires.get(i)
+            if requires is None:
+                offsets.add(i)
+                continue
 
-                if c == '{':
-                    bracket_level += 1
-                elif c == '}' and bracket_level > 0:
-                    bracket_level -= 1
-                    if bracket_level == 0:
-                        rules.append(CSSRule(cur_rule))
-                        cur_rule = ''
+            matches = [_selector_matches(classes, whitelist) for classes in requires]
+            if not any(matches) and not (keep_unscoped and not all(requires)):
+                continue
+            offsets.add(i)
 
-        return rules
+            keep = [m or not classes for m, classes in zip(matches, requires)]
+            if not all(keep):
+                pruned[i] = keep
+
+        names = set()
+        for i in offsets:
+            names.update(self.refs.get(i, ()))
+        for name in names:
+            offsets.update(self.named[name])
+
+        return sorted(offsets), pruned
+
+    def lookup(self, whitelist: Iterable, keep_unscoped: bool = False) -> List[int]:
+        return self.select(whitelist, keep_unscoped)[0]
+
+    def dumps(self) -> bytes:
+        state = (self.cright, self.spans, self.parents, self.heads, self.always,
+                 self.comments, self.classes, self.requires, self.unscoped,
+                 self.named, self.refs)
+        return pickle.dumps((self.version, *state), protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def loads(cls, data: bytes) -> Optional['CSSIndex']:
+        """Load a serialized index, returns None if it has an outdated format."""
+        try:
+            version, *state = pickle.loads(data)
+        except (pickle.UnpicklingError, EOFError, ValueError, TypeError):
+            return None
+        if version != cls.version:
+            return None
+        return cls(*state)
+
+    @classmethod
+    def load(cls, index_file) -> Optional['CSSIndex']:
+        with open(index_file, 'rb') as f:
+            return cls.loads(f.read())
+
+
+class _Tokenizer:
+    """The scanner of :meth:`CSSPurge._tokenize`.
+
+    Quoted strings are matched as tokens and skipped, so braces inside of
+    them are ignored.
+    """
+
+    def __init__(self, css: bytes):
+        self.css = css
+        self.spans = array('I')
+        self.parents = array('i')
+        self.heads = {}  # type: Dict[int, int]
+        self.statements = array('I')
+        self.comments = array('I')
+        self.cright = None  # type: Optional[str]
+
+        # Open group at-rules
+        self.groups = []  # type: List[int]
+        # Offset of the rule currently open, and bracket level inside of it
+        self.rule = -1
+        self.bracket_level = 0
+        self.rule_start = 0
+
+    def tokenize(self) -> Tokens:
+        pos = 0
+        while True:
+            match = _TOKEN_RE.search(self.css, pos)
+            if not match:
+                break
+
+            token = match.group()
+            pos = match.end()
+
+            if token == b'/*':
+                pos = self.scan_comment(match.start(), pos)
+            elif token == b'{':
+                self.open_block(pos)
+            elif token == b'}':
+                self.close_block(pos)
+
+        self.drop_unclosed()
+        return (self.spans, self.parents, self.heads, self.statements,
+                self.comments, self.cright or '')
+
+    def scan_comment(self, start: int, pos: int) -> int:
+        """Record the comment opened at ``start``, return its end."""
+        end = self.css.find(b'*/', pos)
+        end = len(self.css) if end == -1 else end + 2
+        if self.cright is None:
+            self.cright = self.css[pos:end - 2].decode('utf-8').strip()
+
+        self.comments.append(start)
+        self.comments.append(end)
+        return end
+
+    def add_span(self, start: int, end: int) -> int:
+        i = len(self.parents)
+        self.spans.append(start)
+        self.spans.append(end)
+        self.parents.append(self.groups[-1] if self.groups else -1)
+        return i
+
+    def scan_statement(self, header: bytes) -> bytes:
+        """Record a statement at-rule (``@import url(x);``) preceding a rule.
+
+        Returns the remaining header of the rule.
+        """
+        semicolon = header.rfind(b';')
+        if semicolon == -1 or not _is_at_rule(header[:semicolon]):
+            return header
+
+        self.statements.append(
+            self.add_span(self.rule_start, self.rule_start + semicolon + 1))
+        self.rule_start += semicolon + 1
+        return header[semicolon + 1:]
+
+    def open_block(self, pos: int) -> None:
+        if self.rule != -1:
+            self.bracket_level += 1
+            return
+
+        header = self.scan_statement(self.css[self.rule_start:pos])
+        i = self.add_span(self.rule_start, 0)
+        if _is_group_at_rule(header):
+            self.heads[i] = pos
+            self.groups.append(i)
+            self.rule_start = pos
+        else:
+            self.rule = i
+            self.bracket_level = 1
+
+    def close_block(self, pos: int) -> None:
+        if self.rule != -1:
+            self.bracket_level -= 1
+            if self.bracket_level == 0:
+                self.spans[2 * self.rule + 1] = pos
+                self.rule = -1
+                self.rule_start = pos
+        elif self.groups:
+            self.spans[2 * self.groups.pop() + 1] = pos
+            self.rule_start = pos
+
+    def drop_unclosed(self) -> None:
+        """Drop everything from the first rule that was never closed."""
+        unclosed = self.groups[:1] + ([self.rule] if self.rule != -1 else [])
+        if unclosed:
+            first = unclosed[0]
+            del self.spans[2 * first:]
+            del self.parents[first:]
+            self.heads = {g: end for g, end in self.heads.items() if g < first}
+            self.statements = array('I', [i for i in self.statements if i < first])
+
+
+class CSSPurge:
+    # Bump whenever purging produces different output for the same input,
+    # this invalidates cached purge results.
+    version = 5
+
+    def __init__(self, css: Union[str, bytes], index: CSSIndex = None):
+        if isinstance(css, str):
+            css = css.encode('utf-8')
+        self.buffer = css
+        self._index = index
+        self._css_rules = None
+
+    @classmethod
+    def from_file(cls, css_file, index: CSSIndex = None):
+        with open(css_file, 'rb') as f:
+            return cls(f.read(), index)
+
+    @property
+    def index(self) -> CSSIndex:
+        if self._index is None:
+            self._index = CSSIndex.from_css(self.buffer)
+        return self._index
+
+    @index.setter
+    def index(self, index: CSSIndex):
+        self._index = index
+
+    @property
+    def cright(self) -> str:
+        return self.index.cright
+
+    @property
+    def css_rules(self) -> List[CSSRule]:
+        """Top-level rules of the stylesheet."""
+        if self._css_rules is None:
+            index = self.index
+            self._css_rules = [CSSRule(index.rule_css(self.buffer, i))
+                               for i in range(len(index)) if index.parents[i] == -1]
+        return self._css_rules
+
+    @staticmethod
+    def _tokenize(css: bytes) -> Tokens:
+        """Split the stylesheet into rules and locate its comments.
+
+        This is a single pass over the input: the scanner jumps from one
+        significant token to the next and records byte offsets only.
+        Group at-rules are descended into, their rules follow them in
+        document order. Returns the rule spans, parent offsets, group
+        header ends, statement at-rule offsets, comment spans and the text of
+        the first comment (copyright banner).
+        """
+        return _Tokenizer(css).tokenize()
+
+    @staticmethod
+    def filter_comments(css: str) -> Tuple[str, str]:
+        match = _COMMENT_RE.search(css)
+        cright = match.group(1).strip() if match else ''
+        return _COMMENT_RE.sub('', css), cright
+
+    @staticmethod
+    def _parse(css: str) -> List[CSSRule]:
+        return CSSPurge(css).css_rules
 
     @staticmethod
     def classes_from_html(html: str) -> Set[str]:
+        """Return the classes used in a HTML snippet.
+
+        Variant classes like ``md:hover:bg-red-500`` are kept as a whole.
+        """
         classes = set()
 
-        for cls_str in re.findall(r'class="([\w\d\-_: ]+)"', html):
-            cls_str = cls_str.replace(':', ' ')
-            classes.update(cls_str.split())
+        for dquoted, squoted in _HTML_CLASS_RE.findall(html):
+            classes.update((dquoted or squoted).split())
 
         return classes
 
     def _filter_rules(self, whitelist: Iterable) -> List[CSSRule]:
-        return list(filter(lambda r: r.matches_whitelist(whitelist), self.css_rules))
+        return [CSSRule(self.index.rule_css(self.buffer, i))
+                for i in self.index.lookup(whitelist)]
+
+    def _chunks(self, view: memoryview, whitelist: Iterable,
+                keep_unscoped: bool) -> Iterator[bytes]:
+        """Yield the purged stylesheet as slices of the source buffer."""
+        index = self.index
+        # Group at-rules opened in the output
+        stack = []
+        offsets, pruned = index.select(whitelist, keep_unscoped)
+
+        # Unchanged, minifiers keep /*! license comments
+        for a, b in index.banners(self.buffer):
+            yield view[a:b]
+
+        for i in offsets:
+            chain = index.ancestors(i)
+            common = 0
+            for opened, group in zip(stack, chain):
+                if opened != group:
+                    break
+                common += 1
+
+            if len(stack) > common:
+                yield b'}' * (len(stack) - common)
+                del stack[common:]
+
+            for group in chain[common:]:
+                for a, b in index.pieces(index.spans[2 * group], index.heads[group]):
+                    yield view[a:b]
+                stack.append(group)
+
+            if i in pruned:
+                css = _prune_selectors(index.rule_css(self.buffer, i), pruned[i])
+                yield css.encode('utf-8')
+            else:
+                for a, b in index.pieces(index.spans[2 * i], index.spans[2 * i + 1]):
+                    yield view[a:b]
+
+        yield b'}' * len(stack)
 
-    def purge(self, whitelist: Iterable) -> str:
-        filtered_rules = self._filter_rules(whitelist)
-        css_str = ''.join([str(rule) for rule in filtered_rules])
-        return '/* %s */ %s' % (self.cright, css_str)
+    def purge(self, whitelist: Iterable, keep_unscoped: bool = False) -> str:
+        """Return the stylesheet with all rules not matching the whitelist removed.
 
-    def purge_to_file(self, whitelist: Iterable, out_file):
-        out_css = self.purge(whitelist)
+        Selectors of which not all classes are in the whitelist are removed
+        from selector lists. Group at-rules are kept if at least one of their
+        rules is kept.
+        If ``keep_unscoped`` is set, rules with selectors not using any
+        classes (``body``, ``:root``...) are kept, too.
+        """
+        with memoryview(self.buffer) as view:
+            chunks = self._chunks(view, whitelist, keep_unscoped)
+            return b''.join(chunks).decode('utf-8')
 
-        with open(out_file, 'w', encoding='utf-8') as f:
-            f.write(out_css)
+    def purge_to_file(self, whitelist: Iterable, out_file, keep_unscoped: bool = False):
+        """Write the purged stylesheet directly from the source buffer."""
+        with open(out_file, 'wb') as f, memoryview(self.buffer) as view:
+            for chunk in self._chunks(view, whitelist, keep_unscoped):
+                f.write(chunk)
@@ -23,11 +23,13 @@ from sphinx_revealit.nodes import (
     revealjs_div,
     revealjs_title,
 )
+from sphinx_revealit.profiling import profiled
 from sphinx_revealit.transforms import RevealjsIdAttribute
 
 logger = logging.getLogger(__name__)
 
 
+@profiled
 class RevealjsSection(Directive):
     option_spec = RjsElementSection.option_spec()
 
@@ -37,6 +39,7 @@ class RevealjsSection(Directive):
         return [node]
 
 
+@profiled
 class RevealjsBreak(Directive):  # noqa: D101
     option_spec = RjsElementSection.option_spec()
 
@@ -46,6 +49,7 @@ class RevealjsBreak(Directive):  # noqa: D101
         return [node]
 
 
+@profiled
 class RevealjsDeck(Directive):  # noqa: D101
     has_content = True
     option_spec = RjsElementDeck.option_spec()
@@ -57,6 +61,7 @@ class RevealjsDeck(Directive):  # noqa: D101
         return [node]
 
 
+@profiled
 class RevealjsEffect(Directive):
     has_content = True
     option_spec = RjsElementEffect.option_spec()
@@ -73,6 +78,7 @@ class RevealjsEffect(Directive):
         return [node]
 
 
+@profiled
 class RevealjsEffects(Directive):
     has_content = True
     required_arguments = 1
@@ -117,6 +123,7 @@ class RevealjsEffects(Directive):
         return [root_node]
 
 
+@profiled
 class RevealjsFragments(Directive):  # noqa: D101
     has_content = True
     option_spec = RjsElementFragments.option_spec()
@@ -151,6 +158,7 @@ class RevealjsFragments(Directive):  # noqa: D101
         return [node]
 
 
+@profiled
 class RevealjsId(Directive):
     """
     Set the reveal.js data-id on the directive content or the next element.
@@ -211,6 +219,7 @@ def code_block_post(self, nodes, hl_lines):
     return nodes
 
 
+@profiled
 class RevealjsCode(CodeBlock):
     option_spec = {
         **CodeBlock.option_spec,
@@ -223,6 +232,7 @@ class RevealjsCode(CodeBlock):
         return code_block_post(self, nodes, hl_lines)
 
 
+@profiled
 class RevealjsLiteralInclude(LiteralInclude):
     option_spec = {
         **LiteralInclude.option_spec,
@@ -235,6 +245,7 @@ class RevealjsLiteralInclude(LiteralInclude):
         return code_block_post(self, nodes, hl_lines)
 
 
+@profiled
 class RevealjsDiv(Directive):
     has_content = True
     option_spec = RjsElementDiv.option_spec()
@@ -252,6 +263,7 @@ class RevealjsDiv(Directive):
         return [node]
 
 
+@profiled
 class RevealjsBox(Directive):
     has_content = True
     option_spec = RjsElementBox.option_spec()
@@ -269,6 +281,7 @@ class RevealjsBox(Directive):
         return [node]
 
 
+@profiled
 class RevealjsTitle(Directive):
     has_content = True
     required_arguments = 1
@@ -9,14 +9,24 @@ logger = logging.getLogger(__name__)
 
 
 class Attr:
+    __slots__ = ()
+
+    def __reduce__(self):
+        return self.__class__, ()
+
     def out(self, elm: 'RjsElement', env_imgpath, env_images):
         return ''
 
 
 class AttrVal(Attr):
+    __slots__ = ('val',)
+
     def __init__(self, val):
         self.val = val
 
+    def __reduce__(self):
+        return self.__class__, (self.val,)
+
     def __repr__(self):
         return repr(self.val)
 
@@ -28,6 +38,8 @@ class AttrVal(Attr):
 
 
 class AttrValImage(AttrVal):
+    __slots__ = ()
+
     def out(self, elm: 'RjsElement', env_imgpath, env_images):
         if self.val in elm.images:
             aimg = elm.images[self.val]
@@ -108,12 +120,21 @@ class OptionCDataJSON(Option):
 
 
 class RjsElement:
+    """Attributes of a Reveal.js element, stored in the doctree.
+
+    Elements are pickled into every doctree, as tuple of their state.
+    """
+    __slots__ = ('attrs', 'classes', 'cdata', 'images', '_opening_tag')
+
     tag = ''
     options: Dict[str, Option] = {}
 
     arguments: List[Option] = []
     n_req_arguments = 0
 
+    # Attributes pickled by __getstate__, in this order
+    state_attrs = ('attrs', 'classes', 'cdata', 'images')
+
     def __init__(self, arguments: list = None, options: dict = None):
         self.attrs = {}
         self.classes = []
@@ -122,6 +143,9 @@ class RjsElement:
         # Image URI -> Actual path (gets populated by collector)
         self.images = {}
 
+        # Result of compile_opening_tag, reset when attributes or classes change
+        self._opening_tag = None
+
         if arguments:
             for i, val in enumerate(arguments[0:len(self.arguments)]):
                 self.arguments[i].apply(self, val)
@@ -131,6 +155,14 @@ class RjsElement:
                 if key in self.options:
                     self.options[key].apply(self, val)
 
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.state_attrs)
+
+    def __setstate__(self, state):
+        for name, val in zip(self.state_attrs, state):
+            setattr(self, name, val)
+        self._opening_tag = None
+
     @classmethod
     def from_directive(cls, directive: Directive):
         return cls(directive.arguments, directive.options)
@@ -148,10 +180,12 @@ class RjsElement:
     def add_attr(self, name, val):
         if val:
             self.attrs[name] = val
+            self._opening_tag = None
 
     def add_cls(self, cls):
         if cls:
             self.classes.append(cls)
+            self._opening_tag = None
 
     def add_cdata(self, name, val):
         if val:
@@ -165,30 +199,60 @@ class RjsElement:
                 uris.append(attr.val)
         return uris
 
-    def get_opening_tag(self, node, env_imgpath, env_images):
-        attrs = self.attrs.copy()
-        classes = node.get('classes', []) + self.classes
-
+    def compile_opening_tag(self) -> tuple:
+        """Render the attributes which are the same on every page.
+
+        Returns the complete tag (None if it has image attributes), the
+        attribute strings with ``(key, attr)`` pairs for the image attributes
+        and the classes of the element.
+        """
+        attr_strs = []
+        for key, val in self.attrs.items():
+            if isinstance(val, AttrValImage):
+                # The path of the image depends on the page
+                attr_strs.append((key, val))
+            elif isinstance(val, Attr):
+                attr_strs.append(key + val.out(self, None, None))
+            elif val:
+                attr_strs.append('%s="%s"' % (key, str(val)))
+
+        classes = ' '.join(self.classes)
+        static = None
+        if all(isinstance(a, str) for a in attr_strs):
+            static = self.render_opening_tag(attr_strs, classes)
+        return static, attr_strs, classes
+
+    def render_opening_tag(self, attr_strs: list, classes: str) -> str:
         if classes:
-            attrs['class'] = AttrVal(' '.join(classes))
-
-        if attrs:
-            attr_strs = []
-            for key, val in attrs.items():
-                if isinstance(val, Attr):
-                    attr_strs.append(key + val.out(self, env_imgpath, env_images))
-                elif val:
-                    attr_strs.append('%s="%s"' % (key, str(val)))
-
+            attr_strs = attr_strs + ['class="%s"' % classes]
+        if attr_strs:
             return '<%s %s>\n' % (self.tag, ' '.join(attr_strs))
-        else:
-            return '<%s>\n' % self.tag
+        return '<%s>\n' % self.tag
+
+    def get_opening_tag(self, node, env_imgpath, env_images):
+        if self._opening_tag is None:
+            self._opening_tag = self.compile_opening_tag()
+        static, attr_strs, classes = self._opening_tag
+
+        node_classes = node.get('classes')
+        if static is not None and not node_classes:
+            return static
+
+        if node_classes:
+            classes = ' '.join(node_classes + self.classes)
+        attr_strs = [
+            a if isinstance(a, str) else a[0] + a[1].out(self, env_imgpath, env_images)
+            for a in attr_strs
+        ]
+        return self.render_opening_tag(attr_strs, classes)
 
     def get_closing_tag(self):
         return '</%s>\n' % self.tag
 
 
 class RjsElementSection(RjsElement):
+    __slots__ = ()
+
     tag = 'section'
     options = {
         'background-color': Option('data-background-color'),
@@ -221,6 +285,8 @@ class RjsElementSection(RjsElement):
 
 
 class RjsElementDeck(RjsElement):
+    __slots__ = ()
+
     options = {
         'theme': OptionCData('theme'),
         'conf': OptionCDataJSON('conf'),
@@ -229,6 +295,8 @@ class RjsElementDeck(RjsElement):
 
 
 class RjsElementEffect(RjsElement):
+    __slots__ = ()
+
     tag = 'div'
     arguments = [OptionCClass()]
     options = {
@@ -242,6 +310,8 @@ class RjsElementEffect(RjsElement):
 
 
 class RjsElementFragments(RjsElement):
+    __slots__ = ()
+
     tag = 'div'
     arguments = [OptionCData('animation')]
     options = {
@@ -251,6 +321,8 @@ class RjsElementFragments(RjsElement):
 
 
 class RjsElementDiv(RjsElement):
+    __slots__ = ()
+
     tag = 'div'
     arguments = [OptionCClass()]
     options = {
@@ -260,13 +332,17 @@ class RjsElementDiv(RjsElement):
 
 
 class RjsElementBox(RjsElementDiv):
+    __slots__ = ()
+
     def __init__(self, arguments: list = None, options: dict = None):
         super().__init__(arguments, options)
-        self.classes.append('box')
+        self.add_cls('box')
 
 
 class RjsElementTitle(RjsElement):
-    tag = 'h'
+    __slots__ = ('tag', 'content')
+
+    state_attrs = RjsElement.state_attrs + ('tag', 'content')
     options = {
         'data-id': Option('data-id'),
         'class': OptionCClass(),
@@ -275,6 +351,8 @@ class RjsElementTitle(RjsElement):
 
     def __init__(self, arguments: list = None, options: dict = None):
         super().__init__(arguments, options)
+        self.tag = 'h'
+        self.content = ''
 
         if not arguments:
             return
@@ -283,7 +361,6 @@ class RjsElementTitle(RjsElement):
         args_split = [a.strip() for a in str(raw_args).split('\n', 2)]
 
         level = 3
-        self.content = ''
 
         if len(args_split) == 1:
             self.content = args_split[0]
@@ -0,0 +1,236 @@
+"""Web fonts for the ``revealjs_font_*`` options.
+
+A font is configured as family name (the font has to be installed or
+provided by a stylesheet) or as dict with the font files::
+
+    revealjs_font_body = {
+        'family': 'Fira Sans',
+        'files': ['fonts/FiraSans-Regular.ttf', 'fonts/FiraSans-Bold.ttf'],
+    }
+
+Weight and style of the files are read from the fonts (with fontTools) or
+guessed from their filenames. With fontTools installed, the fonts are
+subset to the characters used by the presentation and written as woff2.
+"""
+import io
+import logging
+import re
+import string
+from os import path
+from typing import Dict, List, Optional, Set, Tuple
+
+try:
+    from fontTools import subset as ft_subset
+    from fontTools.ttLib import TTFont
+except ImportError:  # pragma: no cover
+    ft_subset = None
+
+try:
+    import brotli  # noqa: F401 (required by fontTools to write woff2)
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# Bump when the output changes, subset fonts are cached by this version
+version = 2
+
+FORMATS = {'.woff2': 'woff2', '.woff': 'woff', '.ttf': 'truetype', '.otf': 'opentype'}
+MIME_TYPES = {
+    'woff2': 'font/woff2', 'woff': 'font/woff',
+    'truetype': 'font/ttf', 'opentype': 'font/otf',
+}
+
+# CSS variables of sphinx_revealit.css and fallbacks per role
+ROLE_VARIABLES = {
+    'body': '--main-font', 'title': '--heading-font', 'code': '--code-font',
+}
+ROLE_FALLBACKS = {
+    'body': 'Helvetica, sans-serif',
+    'title': 'Helvetica, sans-serif',
+    'code': 'monospace',
+}
+
+# Characters always included in subset fonts (slide numbers, plugin UI...)
+BASE_CHARACTERS = string.printable.strip() + '  –—‘’“”…'
+
+WEIGHT_NAMES = [
+    ('extralight', 200), ('ultralight', 200), ('semibold', 600), ('demibold', 600),
+    ('extrabold', 800), ('ultrabold', 800), ('thin', 100), ('light', 300),
+    ('medium', 500), ('bold', 700), ('black', 900), ('heavy', 900),
+]
+
+_HEADING_WEIGHT_RE = re.compile(r'--heading-font-weight:\s*([^;}]+)')
+
+_DEFAULT_FONT_DIR = path.join(path.dirname(path.abspath(__file__)), 'themes',
+                              'sphinx_revealit', 'static', 'fonts', 'source-sans-pro')
+
+
+class FontFace:
+    """A font file with its weight and style."""
+
+    def __init__(self, fpath: str, weight: int, style: str,
+                 static_name: Optional[str] = None):  # noqa: D107
+        self.fpath = fpath
+        self.weight = weight
+        self.style = style
+        # Name of the copy the theme ships in _static/fonts, served unsubset
+        self.static_name = static_name
+
+    @classmethod
+    def from_file(cls, fpath: str) -> 'FontFace':
+        """Read weight and style from the font, or guess them from the filename."""
+        if ft_subset is not None:
+            try:
+                font = TTFont(fpath, lazy=True)
+                os2 = font['OS/2']
+                italic = bool(os2.fsSelection & 1) or bool(font['head'].macStyle & 2)
+                return cls(fpath, os2.usWeightClass, 'italic' if italic else 'normal')
+            except Exception:
+                pass
+
+        name = path.splitext(path.basename(fpath))[0].lower()
+        name = name.replace('-', '').replace('_', '')
+        weight = next((w for n, w in WEIGHT_NAMES if n in name), 400)
+        style = 'italic' if 'italic' in name or 'oblique' in name else 'normal'
+        return cls(fpath, weight, style)
+
+    def digest_parts(self) -> List[bytes]:
+        with open(self.fpath, 'rb') as f:
+            return [f.read(), str(self.weight).encode(), self.style.encode()]
+
+    def output_name(self, family: str, key: str, fmt: str) -> str:
+        slug = re.sub(r'[^a-z0-9]+', '-', family.lower()).strip('-')
+        ext = {'truetype': 'ttf', 'opentype': 'otf'}.get(fmt, fmt)
+        return f'{slug}-{self.weight}{self.style[0]}-{key}.{ext}'
+
+
+class Font:
+    """A font family, with the files to serve (if any)."""
+
+    def __init__(self, family: str, faces: List[FontFace], fallback: str,
+                 subset: bool = True):  # noqa: D107
+        self.family = family
+        self.faces = faces
+        self.fallback = fallback
+        # Whether the font may be subset
+        self.subset = subset
+
+    def closest_face(self, weight: int = 400) -> Optional[FontFace]:
+        """Return the face closest to a weight, preferring upright styles."""
+        if not self.faces:
+            return None
+        return min(self.faces,
+                   key=lambda f: (f.style != 'normal', abs(f.weight - weight)))
+
+    def css_value(self) -> str:
+        return '%s, %s' % (quote_family(self.family), self.fallback)
+
+
+def default_body_font() -> Font:
+    """Return Source Sans Pro, bundled with the theme.
+
+    It is served unmodified, its license reserves the font name for
+    unmodified versions. The pages use the files copied with the theme.
+    """
+    styles = (('regular', 400, 'normal'), ('italic', 400, 'italic'),
+              ('semibold', 600, 'normal'), ('semibolditalic', 600, 'italic'))
+    faces = []
+    for name, weight, style in styles:
+        filename = 'source-sans-pro-%s.woff' % name
+        faces.append(FontFace(path.join(_DEFAULT_FONT_DIR, filename), weight, style,
+                              'source-sans-pro/' + filename))
+    return Font('Source Sans Pro', faces, ROLE_FALLBACKS['body'], subset=False)
+
+
+def parse_font(value, role: str, confdir: str) -> Optional[Font]:
+    """Return the font configured for a role (or None if not configured)."""
+    if not value:
+        return None
+    if isinstance(value, str):
+        return Font(value, [], ROLE_FALLBACKS[role])
+
+    files = [path.join(confdir, f) for f in value.get('files', [])]
+    return Font(value['family'], [FontFace.from_file(f) for f in files],
+                value.get('fallback', ROLE_FALLBACKS[role]))
+
+
+def quote_family(family: str) -> str:
+    return "'%s'" % family.replace('\\', '\\\\').replace("'", "\\'")
+
+
+def heading_weight(css: str) -> int:
+    """Return the ``--heading-font-weight`` a theme stylesheet sets (or 400)."""
+    weight = 400
+    for match in _HEADING_WEIGHT_RE.finditer(css):
+        value = match.group(1).strip()
+        if value.isdigit():
+            weight = int(value)
+        else:
+            weight = {'normal': 400, 'bold': 700}.get(value, weight)
+    return weight
+
+
+def can_subset() -> bool:
+    return ft_subset is not None
+
+
+def output_format(face: FontFace, subset: bool) -> str:
+    """Return the format a face is written in."""
+    if subset:
+        return 'woff2' if brotli is not None else 'woff'
+    return FORMATS.get(path.splitext(face.fpath)[1].lower(), 'truetype')
+
+
+def subset_font(fpath: str, text: str, fmt: str) -> bytes:
+    """Return the font reduced to the glyphs needed for ``text``."""
+    # fontTools reports every dropped table
+    logging.getLogger('fontTools.subset').setLevel(logging.ERROR)
+    options = ft_subset.Options()
+    options.flavor = fmt
+    options.layout_features = ['*']
+    options.notdef_outline = True
+    font = TTFont(fpath, lazy=False)
+    subsetter = ft_subset.Subsetter(options)
+    subsetter.populate(text=text)
+    subsetter.subset(font)
+    font.flavor = fmt
+
+    out = io.BytesIO()
+    font.save(out)
+    return out.getvalue()
+
+
+def font_face_rule(family: str, face: FontFace, url: str, fmt: str) -> str:
+    return ('@font-face {\n'
+            '    font-family: %s;\n'
+            '    src: url(\'%s\') format(\'%s\');\n'
+            '    font-weight: %d;\n'
+            '    font-style: %s;\n'
+            '    font-display: swap;\n'
+            '}\n' % (quote_family(family), url, fmt, face.weight, face.style))
+
+
+def fonts_stylesheet(fonts: Dict[str, Font],
+                     files: Dict[Tuple[str, int], Tuple[str, str]],
+                     configured: Set[str]) -> str:
+    """Return the stylesheet with ``@font-face`` rules and the CSS variables.
+
+    ``files`` maps ``(role, face index)`` to the URL (relative to the
+    stylesheet) and format of the written font file. Variables are only
+    set for ``configured`` roles, the theme decides about the others.
+    """
+    rules = []
+    variables = []
+    families = set()
+    for role, font in fonts.items():
+        if role in configured:
+            variables.append('    %s: %s;\n' % (ROLE_VARIABLES[role], font.css_value()))
+        if font.family in families:
+            continue
+        families.add(font.family)
+        for i, face in enumerate(font.faces):
+            if (role, i) in files:
+                url, fmt = files[role, i]
+                rules.append(font_face_rule(font.family, face, url, fmt))
+    if variables:
+        rules.append(':root {\n%s}\n' % ''.join(variables))
+    return ''.join(rules)
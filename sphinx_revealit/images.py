@@ -0,0 +1,88 @@
+"""Downscaling and re-encoding of slide images (requires Pillow)."""
+import io
+from typing import Optional, Tuple
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover
+    Image = None
+
+# Bump when the output changes, optimized images are cached by this version
+version = 2
+
+# Formats which are re-encoded, others (GIF, SVG...) are copied as they are
+OPTIMIZED_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+# Formats which get a WebP variant
+WEBP_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def available() -> bool:
+    return Image is not None
+
+
+def webp_name(filename: str) -> str:
+    """Return the name of the WebP variant of an image."""
+    return filename + '.webp'
+
+
+def has_webp_variant(filename: str) -> bool:
+    return filename.lower().endswith(WEBP_EXTENSIONS)
+
+
+def can_convert_webp(src: str) -> bool:
+    """Whether :func:`optimize_image` returns a WebP variant of an image.
+
+    Only the header of the image is read.
+    """
+    try:
+        with Image.open(src) as img:
+            animated = getattr(img, 'is_animated', False)
+            return img.format in ('JPEG', 'PNG') and not animated
+    except Exception:
+        return False
+
+
+def _encode(img: 'Image.Image', fmt: str, quality: int) -> bytes:
+    out = io.BytesIO()
+    if fmt == 'JPEG':
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        img.save(out, 'JPEG', quality=quality, optimize=True, progressive=True)
+    elif fmt == 'PNG':
+        img.save(out, 'PNG', optimize=True)
+    else:
+        img.save(out, 'WEBP', quality=quality, method=6)
+    return out.getvalue()
+
+
+def optimize_image(src: str, max_size: Tuple[int, int], quality: int,
+                   webp: bool) -> Tuple[bytes, Optional[bytes]]:
+    """Return the optimized image and its WebP variant (or None).
+
+    Images larger than ``max_size`` are downscaled, keeping their aspect
+    ratio. The re-encoded image is only used if it was downscaled or got
+    smaller, otherwise the source is returned unchanged. Runs in the worker
+    processes of the builder.
+    """
+    with open(src, 'rb') as f:
+        data = f.read()
+
+    with Image.open(io.BytesIO(data)) as img:
+        fmt = img.format
+        if fmt not in ('JPEG', 'PNG', 'WEBP') or getattr(img, 'is_animated', False):
+            return data, None
+
+        # Apply the EXIF orientation, the metadata is not kept
+        img = ImageOps.exif_transpose(img)
+        resized = img.width > max_size[0] or img.height > max_size[1]
+        if resized:
+            img.thumbnail(max_size, Image.LANCZOS)
+
+        optimized = _encode(img, fmt, quality)
+        if not resized and len(optimized) >= len(data):
+            optimized = data
+
+        variant = None
+        if webp and fmt != 'WEBP':
+            variant = _encode(img, 'WEBP', quality)
+    return optimized, variant
@@ -0,0 +1,275 @@
+"""Inline the assets of written pages to get self-contained HTML files.
+
+Stylesheets (with ``@import`` flattened), scripts, fonts and images of
+a page are embedded, local files become data URIs. Remote resources
+(``http://``, ``https://``, ``//``) are kept as references.
+"""
+import base64
+import html
+import mimetypes
+import re
+from os import path
+from typing import Callable, Match, Optional
+from urllib.parse import unquote
+
+from sphinx.util import logging
+
+logger = logging.getLogger(__name__)
+
+# Types missing in the mimetypes module of some platforms
+MIME_TYPES = {
+    '.woff': 'font/woff',
+    '.woff2': 'font/woff2',
+    '.ttf': 'font/ttf',
+    '.otf': 'font/otf',
+    '.eot': 'application/vnd.ms-fontobject',
+    '.svg': 'image/svg+xml',
+    '.webp': 'image/webp',
+}
+
+# Font formats supported by every browser understanding data URIs
+WEB_FONT_FORMATS = ('woff2', 'woff')
+
+_LINK_RE = re.compile(r'<link\b[^>]*>', re.I)
+_SCRIPT_RE = re.compile(r'<script\b([^>]*)>\s*</script>', re.I)
+_ATTR_RE = re.compile(r'([\w:-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+_URL_ATTR_RE = re.compile(
+    r'(?<=\s)(src|poster|data-src|data-background-image|data-background-video)'
+    r'(\s*=\s*)(?:"([^"]*)"|\'([^\']*)\')', re.I)
+_SRCSET_RE = re.compile(r'(?<=\s)(srcset|data-srcset)(\s*=\s*)"([^"]*)"', re.I)
+
+_CSS_RE = re.compile(
+    r'(?P<comment>/\*.*?\*/)'
+    r'|@import\s+(?:url\(\s*(?P<q1>["\']?)(?P<import_url>[^"\')]*)(?P=q1)\s*\)'
+    r'|(?P<q2>["\'])(?P<import_str>[^"\']*)(?P=q2))\s*(?P<media>[^;]*);'
+    r'|url\(\s*(?:"(?P<url1>[^"]*)"|\'(?P<url2>[^\']*)\'|(?P<url3>[^)"\'\s]*))\s*\)',
+    re.S | re.I)
+_FONT_FACE_RE = re.compile(r'@font-face\s*\{[^}]*\}', re.I)
+_FONT_SRC_RE = re.compile(r'\bsrc\s*:([^;}]*)', re.I)
+_FONT_SRC_ITEM_RE = re.compile(
+    r'(?:url|local)\([^)]*\)(?:\s*format\(\s*["\']?([\w-]+)["\']?\s*\))?', re.I)
+
+
+def is_local(url: str) -> bool:
+    """Whether an URL references a file of the output directory."""
+    if not url or url.startswith('#') or url.startswith('//'):
+        return False
+    return not re.match(r'[a-zA-Z][\w+.-]*:', url)
+
+
+def url_to_path(url: str, base_dir: str) -> str:
+    url = url.split('#', 1)[0].split('?', 1)[0]
+    return path.normpath(path.join(base_dir, unquote(url)))
+
+
+def prune_font_faces(css: str) -> str:
+    """Keep only the last ``src`` of every ``@font-face`` and drop legacy formats.
+
+    If a ``src`` lists a woff2 or woff file, EOT, TrueType and SVG entries
+    are removed, these would only add to the size of the inlined page.
+    """
+    def prune(match):
+        block = match.group()
+        sources = list(_FONT_SRC_RE.finditer(block))
+        if not sources:
+            return block
+
+        # Earlier src declarations are overridden by the last one
+        for src in sources[:-1]:
+            block = block.replace(src.group() + ';', '', 1)
+
+        src = sources[-1].group(1)
+        items = list(_FONT_SRC_ITEM_RE.finditer(src))
+        web_fonts = [m.group() for m in items
+                     if (m.group(1) or '').lower() in WEB_FONT_FORMATS]
+        if web_fonts:
+            block = block.replace(src, ' ' + ', '.join(web_fonts), 1)
+        return block
+
+    return _FONT_FACE_RE.sub(prune, css)
+
+
+def flatten_css(fpath: str, read: Callable[[str], str],
+                rewrite_url: Callable[[str, str], Optional[str]]) -> str:
+    """Return a stylesheet with the contents of local ``@import`` rules.
+
+    ``read`` returns the text of a stylesheet file. ``rewrite_url`` is called
+    with every local ``url()`` and the directory of the stylesheet using it,
+    it returns the replacement (or None to keep the ``url()``). Remote imports
+    are moved to the start of the result.
+    """
+    imports = []
+
+    def flatten(fpath, seen):
+        base_dir = path.dirname(fpath)
+        seen = seen | {fpath}
+
+        def replace(match):
+            if match.group('comment'):
+                return match.group()
+
+            url = match.group('import_url')
+            if url is None:
+                url = match.group('import_str')
+            if url is not None:
+                if not is_local(url):
+                    # @import is only valid at the start of a stylesheet
+                    imports.append(match.group())
+                    return ''
+                target = url_to_path(url, base_dir)
+                if target in seen:
+                    return ''
+                imported = flatten(target, seen)
+                media = match.group('media').strip()
+                return '@media %s{%s}' % (media, imported) if media else imported
+
+            url = match.group('url1') or match.group('url2') or match.group('url3')
+            url = url or ''
+            if not is_local(url):
+                return match.group()
+            return rewrite_url(url, base_dir) or match.group()
+
+        return _CSS_RE.sub(replace, read(fpath))
+
+    css = flatten(fpath, frozenset())
+    return ''.join(imports) + css
+
+
+class AssetInliner:
+    """Embed the stylesheets, scripts and media referenced by pages.
+
+    Assets are read once and reused for all pages of the output directory.
+    """
+
+    def __init__(self, outdir: str,
+                 warn: Optional[Callable[[str], None]] = None):  # noqa: D107
+        self.outdir = outdir
+        self.warn = warn or logger.warning
+        self._data_uris = {}
+        self._stylesheets = {}
+        self._scripts = {}
+
+    def _read(self, fpath: str, ref: str) -> Optional[bytes]:
+        try:
+            with open(fpath, 'rb') as f:
+                return f.read()
+        except OSError:
+            self.warn('cannot inline %s: file not found' % ref)
+            return None
+
+    def data_uri(self, fpath: str, ref: str) -> Optional[str]:
+        """Return a file as data URI."""
+        if fpath not in self._data_uris:
+            data = self._read(fpath, ref)
+            if data is None:
+                return None
+            ext = path.splitext(fpath)[1].lower()
+            mime = MIME_TYPES.get(ext) or mimetypes.guess_type(fpath)[0]
+            mime = mime or 'application/octet-stream'
+            encoded = base64.b64encode(data).decode('ascii')
+            self._data_uris[fpath] = 'data:%s;base64,%s' % (mime, encoded)
+        return self._data_uris[fpath]
+
+    def stylesheet(self, fpath: str) -> str:
+        """Return a stylesheet with imports and referenced files embedded."""
+        if fpath not in self._stylesheets:
+            def read_css(fpath):
+                data = self._read(fpath, path.relpath(fpath, self.outdir))
+                if data is None:
+                    return ''
+                return prune_font_faces(data.decode('utf-8'))
+
+            def rewrite_url(url, base_dir):
+                uri = self.data_uri(url_to_path(url, base_dir), url)
+                return 'url("%s")' % uri if uri else None
+
+            css = flatten_css(fpath, read_css, rewrite_url)
+            self._stylesheets[fpath] = re.sub(r'</(style)', r'<\\/\1', css, flags=re.I)
+        return self._stylesheets[fpath]
+
+    def script(self, fpath: str, ref: str) -> Optional[str]:
+        """Return a script escaped for a ``<script>`` element."""
+        if fpath not in self._scripts:
+            data = self._read(fpath, ref)
+            if data is None:
+                return None
+            js = data.decode('utf-8')
+            js = re.sub(r'</(script)', r'<\\/\1', js, flags=re.I)
+            self._scripts[fpath] = js.replace('<!--', '<\\!--')
+        return self._scripts[fpath]
+
+    def inline_link(self, match: Match, base_dir: str) -> str:
+        """Replace a stylesheet ``<link>`` by a ``<style>`` element."""
+        attrs = {m.group(1).lower(): html.unescape(m.group(2) or m.group(3) or '')
+                 for m in _ATTR_RE.finditer(match.group())}
+        href = attrs.get('href', '')
+        rel = attrs.get('rel', '').lower()
+        if rel == 'preload' and is_local(href):
+            # Preloaded files are embedded
+            return ''
+        if rel != 'stylesheet' or not is_local(href):
+            return match.group()
+        target = url_to_path(href, base_dir)
+        if not path.isfile(target):
+            self.warn('cannot inline %s: file not found' % href)
+            return match.group()
+        media = attrs.get('media')
+        open_tag = '<style media="%s">' % html.escape(media) if media else '<style>'
+        return '%s\n%s\n</style>' % (open_tag, self.stylesheet(target))
+
+    def inline_script(self, match: Match, base_dir: str) -> str:
+        """Replace the ``src`` of a ``<script>`` element by its content."""
+        attrs = list(_ATTR_RE.finditer(match.group(1)))
+        src = next((html.unescape(m.group(2) or m.group(3) or '') for m in attrs
+                    if m.group(1).lower() == 'src'), None)
+        if src is None or not is_local(src):
+            return match.group()
+        js = self.script(url_to_path(src, base_dir), src)
+        if js is None:
+            return match.group()
+        other = ''.join(' ' + m.group() for m in attrs
+                        if m.group(1).lower() not in ('src', 'async', 'defer'))
+        return '<script%s>\n%s\n</script>' % (other, js)
+
+    def inline_url_attr(self, match: Match, base_dir: str) -> str:
+        """Replace the URL of an attribute (``src``, ``poster``...) by a data URI."""
+        value = match.group(3) if match.group(3) is not None else match.group(4)
+        url = html.unescape(value)
+        if not is_local(url):
+            return match.group()
+        uri = self.data_uri(url_to_path(url, base_dir), url)
+        if not uri:
+            return match.group()
+        return '%s%s"%s"' % (match.group(1), match.group(2), uri)
+
+    def inline_srcset(self, match: Match, base_dir: str) -> str:
+        """Replace the URLs of a ``srcset`` attribute by data URIs."""
+        candidates = []
+        for candidate in html.unescape(match.group(3)).split(','):
+            parts = candidate.split()
+            if parts and is_local(parts[0]):
+                uri = self.data_uri(url_to_path(parts[0], base_dir), parts[0])
+                if uri:
+                    parts[0] = uri
+            candidates.append(' '.join(parts))
+        return '%s%s"%s"' % (match.group(1), match.group(2), ', '.join(candidates))
+
+    def inline_page(self, fpath: str) -> None:
+        """Embed the assets of a written page (in place)."""
+        with open(fpath, encoding='utf-8') as f:
+            text = f.read()
+
+        base_dir = path.dirname(fpath)
+        text = _LINK_RE.sub(lambda m: self.inline_link(m, base_dir), text)
+        text = _SCRIPT_RE.sub(lambda m: self.inline_script(m, base_dir), text)
+        # Only rewrite attributes of markup, not the inlined stylesheets and scripts
+        parts = re.split(r'(<(?:style|script)\b[^>]*>.*?</(?:style|script)>)', text,
+                         flags=re.S | re.I)
+        for i in range(0, len(parts), 2):
+            part = _URL_ATTR_RE.sub(
+                lambda m: self.inline_url_attr(m, base_dir), parts[i])
+            parts[i] = _SRCSET_RE.sub(lambda m: self.inline_srcset(m, base_dir), part)
+        text = ''.join(parts)
+
+        with open(fpath, 'w', encoding='utf-8') as f:
+            f.write(text)
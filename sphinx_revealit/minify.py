@@ -0,0 +1,249 @@
+"""Conservative minification of stylesheets and scripts.
+
+Both minifiers only remove comments and collapse whitespace, tokens are never
+rewritten. ``</`` in strings, regular expressions, template literals and kept
+comments is escaped as ``<\\/``, so the output is safe to inline in ``<script>``
+and ``<style>`` elements (see :func:`sphinx_revealit.utils.escapejson`).
+"""
+import re
+from typing import Tuple
+
+# Bump when the output changes, minified files are cached by this version
+version = 1
+
+_CSS_TOKEN_RE = re.compile(
+    r'(?P<comment>/\*.*?(?:\*/|\Z))'
+    r'|(?P<string>"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')'
+    r'|(?P<url>url\([^)"\']*\))'
+    r'|(?P<escape>\\[0-9a-fA-F]{1,6}[ \t\n\r\f]?|\\.)'
+    r'|(?P<ws>\s+)'
+    r'|(?P<other>[\w-]+|.)', re.S | re.I)
+
+# No whitespace is needed after / before these characters
+_CSS_SPACE_AFTER = frozenset('{};,>~(:')
+_CSS_SPACE_BEFORE = frozenset('{};,>~)!')
+
+_JS_TOKEN_RE = re.compile(
+    r'(?P<ws>\s+)'
+    r'|(?P<comment>//[^\r\n\u2028\u2029]*|/\*.*?(?:\*/|\Z))'
+    r'|(?P<string>"(?:[^"\\\r\n]|\\.)*"|\'(?:[^\'\\\r\n]|\\.)*\')'
+    r'|(?P<word>(?:[\w$\\]|[^\x00-\x7f\s])+)'
+    r'|(?P<punct>.)', re.S)
+_JS_REGEX_RE = re.compile(
+    r'/(?![*/])(?:[^/\\\[\r\n]|\\.|\[(?:[^\]\\\r\n]|\\.)*\])+/[\w$]*')
+_JS_NEWLINES = frozenset('\r\n\u2028\u2029')
+
+# A ``/`` after these keywords starts a regular expression
+_JS_REGEX_KEYWORDS = frozenset((
+    'await', 'case', 'delete', 'do', 'else', 'in', 'instanceof', 'new', 'of',
+    'return', 'throw', 'typeof', 'void', 'yield',
+))
+# A ``/`` after a parenthesis closing these statement heads starts a regular expression
+_JS_REGEX_PARENS = frozenset(('if', 'for', 'while', 'with'))
+# Line breaks after / before these characters never end a statement
+_JS_NEWLINE_AFTER = frozenset('{[(,;:=?&|!<>*%^~')
+_JS_NEWLINE_BEFORE = frozenset('}]),;:.?=&|*%^<>')
+
+
+def _escape_end_tags(token: str) -> str:
+    return token.replace('</', '<\\/')
+
+
+def _is_preserved(comment: str) -> bool:
+    """License comments (``/*! ... */``) are kept."""
+    return comment.startswith('/*!')
+
+
+def minify_css(css: str) -> str:
+    """Return the stylesheet without comments and unneeded whitespace."""
+    out = []
+    last = ''
+    space = False
+    semicolon = False
+
+    for match in _CSS_TOKEN_RE.finditer(css):
+        kind = match.lastgroup
+        token = match.group()
+
+        if kind == 'ws' or (kind == 'comment' and not _is_preserved(token)):
+            space = True
+            continue
+
+        # The last declaration of a block needs no semicolon
+        if semicolon:
+            semicolon = False
+            if token != '}':
+                out.append(';')
+                last = ';'
+                space = False
+        if token == ';':
+            semicolon = True
+            continue
+
+        if space:
+            space = False
+            needed = last not in _CSS_SPACE_AFTER and token[0] not in _CSS_SPACE_BEFORE
+            if last and needed:
+                out.append(' ')
+
+        if kind in ('comment', 'string', 'url'):
+            token = _escape_end_tags(token)
+        out.append(token)
+        last = token[-1]
+
+    if semicolon:
+        out.append(';')
+    return ''.join(out)
+
+
+def _is_ident(char: str) -> bool:
+    return char.isalnum() or char in '_$\\' or ord(char) > 0x7f
+
+
+def _js_needs_space(prev: str, token: str) -> bool:
+    a = prev[-1]
+    b = token[0]
+    if _is_ident(a) and _is_ident(b):
+        return True
+    if b == '.' and prev.isdigit():  # 1 .toString()
+        return True
+    # a + +b, a - -b, a / /re/ (would start a comment), <!--, -->
+    return a + b in ('++', '--', '//', '/*', '<!', '->')
+
+
+def _js_joins_lines(prev: str, token: str) -> bool:
+    """Whether a line break between two tokens can never end a statement."""
+    if prev[-1] in _JS_NEWLINE_AFTER:
+        return True
+    return token[0] in _JS_NEWLINE_BEFORE and not (token[0] == '.' and prev.isdigit())
+
+
+def _scan_template(js: str, pos: int) -> Tuple[int, bool]:
+    """Find the end of a template literal part starting at ``pos``.
+
+    Returns the end position and whether the part opens a substitution (``${``).
+    """
+    n = len(js)
+    while pos < n:
+        char = js[pos]
+        if char == '\\':
+            pos += 2
+        elif char == '`':
+            return pos + 1, False
+        elif char == '$' and js.startswith('{', pos + 1):
+            return pos + 2, True
+        else:
+            pos += 1
+    return n, False
+
+
+class _JSMinifier:
+    """Tokenizer state of :func:`minify_js`."""
+
+    def __init__(self, js: str):
+        self.js = js
+        self.out = []
+        self.prev = None
+        # Whether a regular expression can start at the current position
+        self.regex_allowed = True
+        # Pending whitespace: None, ' ' or '\n'
+        self.space = None
+        # Open braces: True for template substitutions
+        self.braces = []
+        # Open parentheses: True if a regular expression can follow the closing one
+        self.parens = []
+
+    def run(self) -> str:
+        pos = 0
+        n = len(self.js)
+        while pos < n:
+            match = _JS_TOKEN_RE.match(self.js, pos)
+            kind = match.lastgroup
+            token = match.group()
+
+            if kind == 'ws' or (kind == 'comment' and not _is_preserved(token)):
+                self.add_space(kind, token)
+            else:
+                if kind == 'punct':
+                    kind, token = self.scan_punct(token, pos)
+                self.write_space(token)
+                self.write_token(kind, token)
+            pos += len(token)
+
+        return ''.join(self.out)
+
+    def add_space(self, kind: str, token: str) -> None:
+        """Replace whitespace or a comment, keeping line breaks."""
+        if self.space == '\n':
+            return
+        line_comment = kind == 'comment' and token.startswith('//')
+        if line_comment or _JS_NEWLINES.intersection(token):
+            self.space = '\n'
+        else:
+            self.space = ' '
+
+    def scan_punct(self, token: str, pos: int) -> Tuple[str, str]:
+        """Return kind and token at a punctuator, it may start a template or regex."""
+        braces = self.braces
+        if token == '`' or (token == '}' and braces and braces[-1]):
+            if token == '}':
+                braces.pop()
+            end, substitution = _scan_template(self.js, pos + 1)
+            if substitution:
+                braces.append(True)
+            return 'template', self.js[pos:end]
+
+        if token == '/' and self.regex_allowed:
+            regex = _JS_REGEX_RE.match(self.js, pos)
+            if regex:
+                return 'regex', regex.group()
+        elif token == '{':
+            braces.append(False)
+        elif token == '}' and braces:
+            braces.pop()
+        elif token == '(':
+            self.parens.append(self.prev in _JS_REGEX_PARENS)
+        return 'punct', token
+
+    def write_space(self, token: str) -> None:
+        """Write the pending whitespace before a token, if needed."""
+        space = self.space
+        self.space = None
+        if not space or self.prev is None:
+            return
+        if space == '\n' and not _js_joins_lines(self.prev, token):
+            self.out.append('\n')
+        elif _js_needs_space(self.prev, token):
+            self.out.append(' ')
+
+    def write_token(self, kind: str, token: str) -> None:
+        if kind in ('comment', 'string', 'template', 'regex'):
+            token = _escape_end_tags(token)
+            if kind == 'string':
+                token = token.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+        self.out.append(token)
+        self.regex_allowed = self.regex_follows(kind, token)
+        self.prev = token
+
+    def regex_follows(self, kind: str, token: str) -> bool:
+        """Whether a ``/`` after the token starts a regular expression."""
+        if kind == 'template':
+            return token.endswith('${')
+        if token == ')':
+            return self.parens.pop() if self.parens else False
+        if kind == 'punct':
+            return token != ']'
+        if kind == 'word':
+            return token in _JS_REGEX_KEYWORDS
+        if kind == 'comment':
+            return self.regex_allowed
+        return False
+
+
+def minify_js(js: str) -> str:
+    """Return the script without comments and unneeded whitespace.
+
+    Line breaks are only removed where they can not end a statement, so
+    automatic semicolon insertion is not affected.
+    """
+    return _JSMinifier(js).run()
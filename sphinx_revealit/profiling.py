@@ -0,0 +1,180 @@
+"""Opt-in profiling of the revealjs builder (``revealjs_profile``)."""
+import glob
+import json
+import os
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from os import path
+from typing import Iterator, Optional
+
+from sphinx.util import logging
+
+logger = logging.getLogger(__name__)
+
+
+class NullProfiler:
+    """Profiler used if profiling is disabled, records nothing."""
+
+    enabled = False
+
+    def start(self, name: str, docname: Optional[str] = None) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    @contextmanager
+    def phase(self, name: str, docname: Optional[str] = None) -> Iterator[None]:
+        yield
+
+
+NULL_PROFILER = NullProfiler()
+
+
+def _reset_peak() -> None:
+    if hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+    else:
+        # Also resets the peak, memory allocated before is forgotten
+        tracemalloc.clear_traces()
+
+
+class Profiler(NullProfiler):
+    """Record wall time, call count and peak memory per phase and document.
+
+    Phases may be nested, the time of a phase includes its nested phases.
+    Peak memory is measured with tracemalloc and only covers memory allocated
+    by Python. Before Python 3.9, which has no ``tracemalloc.reset_peak``,
+    the traces are cleared instead, so the peak only counts memory allocated
+    during the phase.
+
+    Worker processes of parallel builds write their records to ``directory``
+    when their outermost phase ends, these are merged into the report of the
+    main process.
+    """
+
+    enabled = True
+
+    def __init__(self, directory: str):  # noqa: D107
+        self.directory = directory
+        self.pid = os.getpid()
+        # Phase name -> [calls, seconds, peak memory]
+        self.phases = {}
+        # Document name -> phase name -> seconds
+        self.documents = {}
+        # Open phases: [name, docname, start time, peak memory of nested phases]
+        self._stack = []
+        self._worker_file = None
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def start(self, name: str, docname: Optional[str] = None) -> None:
+        if os.getpid() != self.pid:
+            self._start_worker()
+
+        peak = tracemalloc.get_traced_memory()[1]
+        if self._stack:
+            self._stack[-1][3] = max(self._stack[-1][3], peak)
+        _reset_peak()
+        self._stack.append([name, docname, time.perf_counter(), 0])
+
+    def stop(self) -> None:
+        name, docname, t, nested_peak = self._stack.pop()
+        seconds = time.perf_counter() - t
+        peak = max(nested_peak, tracemalloc.get_traced_memory()[1])
+        if self._stack:
+            self._stack[-1][3] = max(self._stack[-1][3], peak)
+
+        stats = self.phases.setdefault(name, [0, 0.0, 0])
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2] = max(stats[2], peak)
+
+        if docname:
+            doc = self.documents.setdefault(docname, {})
+            doc[name] = doc.get(name, 0.0) + seconds
+
+        if self._worker_file and not self._stack:
+            self._dump_worker()
+
+    @contextmanager
+    def phase(self, name: str, docname: Optional[str] = None) -> Iterator[None]:
+        self.start(name, docname)
+        try:
+            yield
+        finally:
+            self.stop()
+
+    def _start_worker(self) -> None:
+        # Forked from the main process, only record the phases of this worker
+        self.pid = os.getpid()
+        self.phases = {}
+        self.documents = {}
+        self._stack = []
+        os.makedirs(self.directory, exist_ok=True)
+        self._worker_file = path.join(self.directory,
+                                      '%d-%s.json' % (self.pid, uuid.uuid4().hex))
+
+    def _dump_worker(self) -> None:
+        with open(self._worker_file, 'w', encoding='utf-8') as f:
+            json.dump({'phases': self.phases, 'documents': self.documents}, f)
+
+    def merge_workers(self) -> None:
+        """Merge and remove the records of finished worker processes."""
+        for fpath in glob.glob(path.join(self.directory, '*.json')):
+            with open(fpath, encoding='utf-8') as f:
+                data = json.load(f)
+            os.remove(fpath)
+
+            for name, (calls, seconds, peak) in data['phases'].items():
+                stats = self.phases.setdefault(name, [0, 0.0, 0])
+                stats[0] += calls
+                stats[1] += seconds
+                stats[2] = max(stats[2], peak)
+
+            for docname, phases in data['documents'].items():
+                doc = self.documents.setdefault(docname, {})
+                for name, seconds in phases.items():
+                    doc[name] = doc.get(name, 0.0) + seconds
+
+    def report(self) -> dict:
+        """Return the recorded numbers as a JSON serializable dict."""
+        return {
+            'phases': {
+                name: {'calls': calls, 'seconds': seconds, 'peak_memory': peak}
+                for name, (calls, seconds, peak) in self.phases.items()
+            },
+            'documents': self.documents,
+        }
+
+    def summary(self) -> str:
+        """Return a table of all phases, sorted by time."""
+        lines = ['%-32s %8s %10s %10s %12s'
+                 % ('phase', 'calls', 'total s', 'mean ms', 'peak MiB')]
+        phases = sorted(self.phases.items(), key=lambda x: -x[1][1])
+        for name, (calls, seconds, peak) in phases:
+            lines.append('%-32s %8d %10.3f %10.3f %12.1f' % (
+                name, calls, seconds, seconds * 1000 / calls, peak / (1024 * 1024)))
+        return '\n'.join(lines)
+
+
+def get_profiler(app) -> NullProfiler:
+    """Return the profiler of the current build (a NullProfiler if disabled)."""
+    return getattr(app.builder, 'profiler', NULL_PROFILER)
+
+
+def profiled(cls):
+    """Class decorator recording the time spent in a directive's ``run``."""
+    run = cls.run
+
+    def wrapper(self):
+        env = self.state.document.settings.env
+        with get_profiler(env.app).phase('directive:' + self.name, env.docname):
+            return run(self)
+
+    wrapper.__doc__ = run.__doc__
+    cls.run = wrapper
+    return cls
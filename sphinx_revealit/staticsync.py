@@ -0,0 +1,98 @@
+"""Synchronization of static files into the output directory.
+
+Files are only copied if they changed, optionally as hardlinks or reflinks.
+Destination files are always replaced (never written in place), so a
+linked package resource can not be modified by a later build step.
+"""
+import filecmp
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+LINK_MODES = ('copy', 'hardlink', 'reflink')
+
+# ioctl to share the data blocks of two files (Linux: btrfs, XFS...)
+FICLONE = 0x40049409
+
+
+def is_unchanged(src: str, dest: str) -> bool:
+    """Whether ``dest`` has the contents of ``src``.
+
+    Files of the same size and modification time (or inode) are assumed
+    equal, otherwise their contents are compared.
+    """
+    try:
+        st_dest = os.stat(dest)
+    except OSError:
+        return False
+    st_src = os.stat(src)
+
+    if st_src.st_size != st_dest.st_size:
+        return False
+    if (st_src.st_ino, st_src.st_dev) == (st_dest.st_ino, st_dest.st_dev):
+        return True
+    if st_src.st_mtime_ns == st_dest.st_mtime_ns:
+        return True
+    if filecmp.cmp(src, dest, shallow=False):
+        # Skip the comparison next time
+        os.utime(dest, ns=(st_src.st_atime_ns, st_src.st_mtime_ns))
+        return True
+    return False
+
+
+def _reflink(src: str, dest: str) -> None:
+    if fcntl is None:
+        raise OSError('reflinks are not supported')
+    with open(src, 'rb') as fsrc, open(dest, 'wb') as fdest:
+        fcntl.ioctl(fdest.fileno(), FICLONE, fsrc.fileno())
+
+
+def sync_file(src: str, dest: str, mode: str = 'copy') -> bool:
+    """Copy or link ``src`` to ``dest`` unless it is unchanged.
+
+    Falls back to copying if linking fails (e.g. across file systems).
+    Returns whether the file was written.
+    """
+    if is_unchanged(src, dest):
+        return False
+
+    tmp = dest + '.tmp'
+    if os.path.lexists(tmp):
+        os.remove(tmp)
+
+    linked = False
+    try:
+        if mode == 'hardlink':
+            os.link(src, tmp)
+            linked = True
+        elif mode == 'reflink':
+            _reflink(src, tmp)
+    except OSError:
+        if os.path.lexists(tmp):
+            os.remove(tmp)
+
+    if not os.path.exists(tmp):
+        shutil.copyfile(src, tmp)
+    if not linked:
+        # Hardlinks share the times of the source already
+        st = os.stat(src)
+        os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(tmp, dest)
+    return True
+
+
+def sync_files(files: Iterable[Tuple[str, str, str]]) -> Tuple[int, int]:
+    """Synchronize ``(src, dest, mode)`` triples in a thread pool.
+
+    Returns the number of written and unchanged files.
+    """
+    with ThreadPoolExecutor() as executor:
+        results = list(executor.map(lambda f: sync_file(*f), files))
+    written = sum(results)
+    return written, len(results) - written
@@ -92,6 +92,14 @@ const Plugin = {
 
     });
 
+    // reveal.js only restores data-src of lazy loaded media, restore
+    // data-srcset (e.g. of <picture> sources) once their slide is loaded
+    var loadSourceSets = function() {
+      Plugin.loadSourceSets(reveal);
+    };
+    reveal.on('ready', loadSourceSets);
+    reveal.on('slidechanged', loadSourceSets);
+
     // If we're printing to PDF, scroll the code highlights of
     // all blocks in the deck into view at once
     reveal.on('pdf-ready', function() {
@@ -102,6 +110,22 @@ const Plugin = {
 
   },
 
+  /**
+   * Moves data-srcset to srcset on all slides displayed by reveal.js,
+   * slides which are not loaded are hidden with display: none.
+   */
+  loadSourceSets: function(reveal) {
+
+    [].slice.call(reveal.getRevealElement().querySelectorAll('[data-srcset]')).forEach(function(element) {
+      for(var section = element.closest('section'); section; section = section.parentElement && section.parentElement.closest('section')) {
+        if(section.style.display === 'none') return;
+      }
+      element.setAttribute('srcset', element.getAttribute('data-srcset'));
+      element.removeAttribute('data-srcset');
+    });
+
+  },
+
   /**
    * Animates scrolling to the first highlighted line
    * in the given code block.
@@ -132,8 +156,8 @@ const Plugin = {
     var targetTop = highlightBounds.top + (Math.min(highlightBounds.bottom - highlightBounds.top, viewportHeight) - viewportHeight) / 2;
 
     // Account for offsets in position applied to the
-    // <table> that holds our lines of code
-    var lineTable = block.querySelector('.hljs-ln');
+    // <table> (or compact container) that holds our lines of code
+    var lineTable = block.querySelector('.hljs-ln, .hljs-lines');
     if(lineTable) targetTop += lineTable.offsetTop - parseInt(blockStyles.paddingTop);
 
     // Make sure the scroll target is within bounds
@@ -194,6 +218,17 @@ const Plugin = {
 
   },
 
+  /**
+   * Returns the elements of all lines of a code block,
+   * either table rows or compact line elements.
+   */
+  getLineElements: function(block) {
+
+    var lines = block.querySelector('.hljs-lines');
+    return lines ? lines.children : block.querySelectorAll('table tr');
+
+  },
+
   /**
    * Visually emphasize specific lines within a code block.
    * This only works on blocks with line numbering turned on.
@@ -211,18 +246,20 @@ const Plugin = {
 
     if(highlightSteps.length) {
 
+      var lineElements = Plugin.getLineElements(block);
+
       highlightSteps[0].forEach(function(highlight) {
 
         var elementsToHighlight = [];
 
         // Highlight a range
         if(typeof highlight.end === 'number') {
-          elementsToHighlight = [].slice.call(block.querySelectorAll('table tr:nth-child(n+' + highlight.start + '):nth-child(-n+' + highlight.end + ')'));
+          elementsToHighlight = [].slice.call(lineElements, Math.max(highlight.start - 1, 0), highlight.end);
         }
         // Highlight a single line
         else
-          if(typeof highlight.start === 'number') {
-            elementsToHighlight = [].slice.call(block.querySelectorAll('table tr:nth-child(' + highlight.start + ')'));
+          if(typeof highlight.start === 'number' && highlight.start > 0) {
+            elementsToHighlight = [].slice.call(lineElements, highlight.start - 1, highlight.start);
           }
 
         if(elementsToHighlight.length) {
@@ -1,5 +1,71 @@
+from typing import NamedTuple, Optional
+
 from docutils import nodes
 from docutils.transforms import Transform
+from sphinx.transforms import SphinxTransform
+
+from sphinx_revealit.nodes import revealjs_deck, revealjs_section
+
+
+class SectionMeta(NamedTuple):
+    """Reveal.js metadata of a section node."""
+    #: First ``revealjs_section`` child (``rjs-section`` options)
+    section: Optional[revealjs_section]
+    #: First ``revealjs_deck`` child
+    deck: Optional[revealjs_deck]
+    #: Whether the section has subsections (vertical slides)
+    has_subsections: bool
+
+
+def collect_section_meta(node: nodes.Element) -> SectionMeta:
+    """Scan the children of a section for its metadata."""
+    section = deck = None
+    has_subsections = False
+    for child in node.children:
+        if isinstance(child, nodes.section):
+            has_subsections = True
+        elif section is None and isinstance(child, revealjs_section):
+            section = child
+        elif deck is None and isinstance(child, revealjs_deck):
+            deck = child
+    return SectionMeta(section, deck, has_subsections)
+
+
+def get_section_meta(node: nodes.Element) -> SectionMeta:
+    """Return the metadata attached by :class:`RevealjsSectionMetadata`.
+
+    Sections of copied nodes lose it, these are scanned again.
+    """
+    meta = getattr(node, 'revealit_meta', None)
+    if meta is None:
+        meta = collect_section_meta(node)
+    return meta
+
+
+def get_document_deck(doctree: nodes.Node) -> Optional[revealjs_deck]:
+    """Return the deck node of a document."""
+    if hasattr(doctree, 'revealit_deck'):
+        return doctree.revealit_deck
+    for node in doctree.traverse(revealjs_deck):
+        return node
+    return None
+
+
+class RevealjsSectionMetadata(SphinxTransform):
+    """Attach the Reveal.js metadata to the section nodes.
+
+    The metadata is pickled with the doctree, so the translator does not
+    have to scan the children of every section again.
+    """
+    default_priority = 880
+
+    def apply(self, **kwargs) -> None:
+        for node in self.document.traverse(nodes.section):
+            node.revealit_meta = collect_section_meta(node)
+        self.document.revealit_deck = None
+        for node in self.document.traverse(revealjs_deck):
+            self.document.revealit_deck = node
+            break
 
 
 class RevealjsIdAttribute(Transform):
@@ -2,6 +2,7 @@ import json
 import re
 
 from pygments.formatters.html import HtmlFormatter
+from pygments.util import get_bool_opt
 from sphinx import __version__
 
 """Util as functions for some modules."""
@@ -39,7 +40,18 @@ def to_json(obj):
 
 
 class RjsPygmentsFormatter(HtmlFormatter):
-    """Format code blocks with the same syntax used by highlight.js"""
+    """Format code blocks with the same syntax used by highlight.js
+
+    With the ``compact`` option, every line is a single ``<span>`` element
+    and line numbers are drawn using CSS counters instead of a table.
+    """
+
+    # Bump when the output changes, highlighted code blocks are cached by this version
+    version = 2
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.compact = get_bool_opt(options, 'compact', False)
 
     def _wrap_linespans(self, inner):
         i = self.linenostart
@@ -48,24 +60,48 @@ class RjsPygmentsFormatter(HtmlFormatter):
             if t:
                 lineno = ''
                 if self.linenos:
-                    lineno = '<td class="hljs-ln-numbers"><div class="hljs-ln-line hljs-ln-n" data-line-number="%d">%d</div></td>' % (
-                        i, i)
+                    lineno = ('<td class="hljs-ln-numbers">'
+                              '<div class="hljs-ln-line hljs-ln-n"'
+                              ' data-line-number="%d">%d</div></td>' % (i, i))
 
-                yield 1, '<tr>%s<td class="hljs-ln-code"><div class="hljs-ln-line">%s</div></td></tr>\n' % (
-                lineno, line)
+                yield 1, ('<tr>%s<td class="hljs-ln-code"><div class="hljs-ln-line">'
+                          '%s</div></td></tr>\n' % (lineno, line))
                 i += 1
             else:
                 yield 0, line
 
+    def _wrap_compact_lines(self, inner):
+        # Lines keep their newline, so no whitespace is emitted between them
+        for t, line in inner:
+            if t:
+                yield 1, '<span class="hljs-line">' + line + '</span>'
+            else:
+                yield 0, line
+
     def wrap(self, source, outfile):
         yield 0, '<table class="hljs-ln"><tbody>\n'
         yield from source
         yield 0, '</tbody></table>'
 
+    def wrap_compact(self, source):
+        if not self.linenos:
+            yield 0, '<span class="hljs-lines">'
+        elif self.linenostart != 1:
+            yield 0, ('<span class="hljs-lines hljs-linenos"'
+                      ' style="counter-reset: hljs-line %d">' % (self.linenostart - 1))
+        else:
+            yield 0, '<span class="hljs-lines hljs-linenos">'
+        yield from source
+        yield 0, '</span>'
+
     def format_unencoded(self, tokensource, outfile):
         source = self._format_lines(tokensource)
-        source = self._wrap_linespans(source)
-        source = self.wrap(source, outfile)
+        if self.compact:
+            source = self._wrap_compact_lines(source)
+            source = self.wrap_compact(source)
+        else:
+            source = self._wrap_linespans(source)
+            source = self.wrap(source, outfile)
 
         for t, piece in source:
             outfile.write(piece)
@@ -1,16 +1,28 @@
 """Custom write module."""
+import posixpath
+import re
+
 from docutils import nodes
 from docutils.nodes import Node
 from sphinx.writers.html5 import HTML5Translator
 
+from sphinx_revealit import images
 from sphinx_revealit.elements import RjsElementSection
 from sphinx_revealit.nodes import RevealjsNode, revealjs_break
+from sphinx_revealit.transforms import get_section_meta
+
+_LAZY_TAG_RE = re.compile(r'<(?:img|video|audio|source|iframe)\b[^>]*>', re.I)
+_LAZY_ATTR_RE = re.compile(r'(\s)(src|srcset)(\s*=)', re.I)
 
 
-def has_child_sections(node: nodes.Element, name: str):
-    """Search has specified section in children."""
-    nodes = set([n.tagname for n in node.children])
-    return name in nodes
+def lazy_load_tags(html: str) -> str:
+    """Replace ``src`` and ``srcset`` of media elements by ``data-``-prefixed ones.
+
+    reveal.js loads ``data-src`` when the slide is within ``viewDistance``,
+    ``data-srcset`` is restored by the sphinx_revealit plugin.
+    """
+    return _LAZY_TAG_RE.sub(
+        lambda m: _LAZY_ATTR_RE.sub(r'\1data-\2\3', m.group()), html)
 
 
 def find_child_section(node: nodes.Element, name: str):
@@ -30,10 +42,20 @@ class RevealjsSlideTranslator(HTML5Translator):
         super().__init__(builder, *args)
         self.builder.add_permalinks = False
         self._proc_first_on_section = False
+        # Number of slides opened so far
+        self.slide_count = 0
 
     def unknown_visit(self, node: Node) -> None:
         pass
 
+    def visit_document(self, node: nodes.document) -> None:
+        self.builder.profiler.start('translate', self.builder.current_docname)
+        super().visit_document(node)
+
+    def depart_document(self, node: nodes.document) -> None:
+        super().depart_document(node)
+        self.builder.profiler.stop()
+
     def visit_section(self, node: nodes.section):
         """Begin ``section`` node.
 
@@ -41,24 +63,25 @@ class RevealjsSlideTranslator(HTML5Translator):
         - When enter next section, nest level.
         """
         self.section_level += 1
-        meta = find_child_section(node, 'revealjs_section')
-        if meta is not None:
-            elm = meta.revealit_el
+        section_meta = get_section_meta(node)
+        if section_meta.section is not None:
+            elm = section_meta.section.revealit_el
         else:
             elm = RjsElementSection()
 
         if self.section_level == 1:
-            self.builder.revealjs_deck = find_child_section(node, 'revealjs_deck')
             self._proc_first_on_section = True
+            self.slide_count += 1
             self.body.append(elm.get_opening_tag(node, self.builder.imgpath, self.builder.images))
             return
         if self._proc_first_on_section:
             self._proc_first_on_section = False
             self.body.append(elm.get_closing_tag())
 
-        if has_child_sections(node, 'section'):
+        if section_meta.has_subsections:
             self._proc_first_on_section = True
             self.body.append('<section>\n')
+        self.slide_count += 1
         self.body.append(elm.get_opening_tag(node, self.builder.imgpath, self.builder.images))
 
     def depart_section(self, node: nodes.section):
@@ -72,7 +95,7 @@ class RevealjsSlideTranslator(HTML5Translator):
 
     def visit_title(self, node):
         if isinstance(node.parent, nodes.section):
-            section_meta = find_child_section(node.parent, 'revealjs_section')
+            section_meta = get_section_meta(node.parent).section
 
             if section_meta:
                 if section_meta.revealit_el.cdata.get('notitle'):
@@ -82,6 +105,40 @@ class RevealjsSlideTranslator(HTML5Translator):
 
         super().visit_title(node)
 
+    def is_lazy_slide(self) -> bool:
+        """Whether media of the current slide are loaded lazily."""
+        if not self.config.revealjs_lazy_loading:
+            return False
+        return self.slide_count > self.config.revealjs_eager_slides
+
+    def visit_image(self, node: nodes.image):
+        start = len(self.body)
+        olduri = node['uri']
+        super().visit_image(node)
+
+        # Offer the WebP variant written by the builder
+        filename = self.builder.images.get(olduri)
+        if filename and self.builder.webp_images.get(olduri):
+            html = ''.join(self.body[start:])
+            suffix = '\n' if html.endswith('\n') else ''
+            webp = posixpath.join(self.builder.imgpath, images.webp_name(filename))
+            self.body[start:] = [
+                '<picture><source srcset="%s" type="image/webp" />%s</picture>%s'
+                % (webp, html[:len(html) - len(suffix)], suffix)
+            ]
+
+        if self.is_lazy_slide():
+            self.body[start:] = [lazy_load_tags(html) for html in self.body[start:]]
+
+    def visit_raw(self, node: nodes.raw):
+        start = len(self.body)
+        try:
+            super().visit_raw(node)
+        finally:
+            # Raw HTML (e.g. iframes) is written in visit_raw, which skips the node
+            if self.is_lazy_slide():
+                self.body[start:] = [lazy_load_tags(html) for html in self.body[start:]]
+
     def visit_comment(self, node: nodes.comment):
         """Begin ``comment`` node.
 
@@ -112,7 +169,7 @@ class RevealjsSlideTranslator(HTML5Translator):
 
         opts = self.config.highlight_options.get(lang, {})
 
-        highlighted = self.highlighter.highlight_block(
+        highlighted = self.builder.highlight_block(
             node.rawsource, lang, opts=opts, linenos=bool(linenos),
             location=node
         )
@@ -162,6 +219,7 @@ def depart_revealjs_break(self, node: revealjs_break):
     render title from current original section.
     """
     attrs = node.attributes_str()
+    self.slide_count += 1
     self.body.append(f'<section {attrs}>\n')
     if 'notitle' not in node.attributes:
         title = find_child_section(node.parent, 'title')
@@ -0,0 +1,259 @@
+"""Benchmark building generated presentations.
+
+Generates a Sphinx project with N decks of M slides each, using nested
+sections, slide breaks, code blocks, fragments, effects, background images
+and tailwind classes. The project is built several times and the duration
+of every build phase is written as JSON.
+"""
+import argparse
+import json
+import platform
+import shutil
+import statistics
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from collections import defaultdict
+from io import StringIO
+from pathlib import Path
+
+import sphinx
+from sphinx.application import Sphinx
+from sphinx.builders import Builder
+
+from sphinx_revealit.builders import RevealjsHTMLBuilder
+from sphinx_revealit.collectors import CSSClassCollector, RevealjsImageCollector
+
+THEMES = ['black', 'white', 'league', 'beige', 'sky', 'night', 'serif', 'solarized',
+          'moon', 'blood']
+EFFECTS = ['fade-up', 'fade-right', 'grow', 'shrink', 'fade-in-then-out']
+TAILWIND_CLASSES = [
+    'grid grid-cols-2 gap-4', 'flex items-center justify-between', 'text-left text-sm',
+    'bg-gray-100 p-4 rounded', 'md:grid-cols-3 lg:p-8', 'text-red-500 font-bold',
+]
+
+CONF = '''\
+project = 'bench'
+extensions = ['sphinx_revealit']
+exclude_patterns = ['_build']
+revealjs_use_tailwind = True
+revealjs_purge_tailwind = True
+revealjs_script_plugins = ['RevealZoom', 'RevealSearch']
+'''
+
+CODE = '''\
+def slide_{n}(items):
+    """Render the items of slide {n}."""
+    result = []
+    for i, item in enumerate(items):
+        if item is None:
+            continue
+        result.append('%d: %s' % (i, item))
+    return '\\n'.join(result)
+'''
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-d', '--decks', type=int, default=10)
+parser.add_argument('-s', '--slides', type=int, default=20)
+parser.add_argument('-n', '--repeat', type=int, default=3)
+parser.add_argument('-o', '--output', type=Path,
+                    help='write the JSON report to a file')
+parser.add_argument('--keep', type=Path,
+                    help='generate the project in this directory and keep it')
+
+
+def png(width: int, height: int, rgb: tuple) -> bytes:
+    """Return a single-colored PNG image."""
+    def chunk(kind, data):
+        crc = struct.pack('>I', zlib.crc32(kind + data))
+        return b''.join([struct.pack('>I', len(data)), kind, data, crc])
+
+    row = b'\0' + bytes(rgb) * width
+    return b''.join([
+        b'\x89PNG\r\n\x1a\n',
+        chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)),
+        chunk(b'IDAT', zlib.compress(row * height)),
+        chunk(b'IEND', b''),
+    ])
+
+
+def heading(text: str, char: str) -> str:
+    return '%s\n%s\n' % (text, char * len(text))
+
+
+def indent(text: str, prefix: str = '  ') -> str:
+    return '\n'.join(prefix + line if line else line for line in text.splitlines())
+
+
+def generate_slide(d: int, s: int) -> str:
+    n = d * 1000 + s
+    effect = EFFECTS[n % len(EFFECTS)]
+    classes = TAILWIND_CLASSES[n % len(TAILWIND_CLASSES)]
+    parts = [
+        heading('Slide %d.%d' % (d, s), '-'),
+        '.. rjs-section::\n  :background-image: /img/bg%d.png\n  :class: %s\n' % (
+            n % 8, classes),
+        '.. rjs-fragments:: %s\n\n  - First point of slide %d\n  - Second point\n'
+        '  - Third point\n' % (effect, s),
+        '.. rjs-effects:: fade-in highlight-red fade-out\n\n'
+        '  Paragraph with a sequence of effects.\n',
+        '.. rjs-code:: python\n  :linenos:\n  :emphasize-lines: 1-2|4-6|8\n\n%s\n' % (
+            indent(CODE.format(n=n))),
+        '.. rjs-break::\n  :transition: zoom\n',
+        '.. rjs-div:: %s\n\n  .. rjs-box:: p-4\n\n    Left column\n\n'
+        '  .. rjs-box:: p-4\n\n    Right column\n' % (
+            TAILWIND_CLASSES[(n + 1) % len(TAILWIND_CLASSES)]),
+    ]
+
+    # Every other slide has vertical sub slides
+    if s % 2:
+        for v in range(2):
+            parts.append(heading('Detail %d.%d.%d' % (d, s, v), '~'))
+            parts.append('.. rjs-section::\n  :background-color: #00%d%d00\n' % (v, v))
+            parts.append('.. rst-class:: text-left\n\n'
+                         'Detail text with ``inline code``.\n')
+
+    return '\n'.join(parts)
+
+
+def generate_deck(d: int, n_slides: int) -> str:
+    parts = [
+        heading('Deck %d' % d, '='),
+        '.. rjs-deck::\n  :theme: %s\n' % THEMES[d % len(THEMES)],
+        '.. rjs-section::\n  :center:\n',
+        '.. rjs-title:: 2\n  Synthetic deck %d\n' % d,
+    ]
+    parts.extend(generate_slide(d, s) for s in range(n_slides))
+    return '\n'.join(parts)
+
+
+def write_project(srcdir: Path, n_decks: int, n_slides: int) -> None:
+    """Write a generated Sphinx project with ``n_decks`` presentations."""
+    (srcdir / 'img').mkdir(parents=True, exist_ok=True)
+    (srcdir / 'conf.py').write_text(CONF)
+
+    for i in range(8):
+        image = png(64, 36, (i * 30, 80, 255 - i * 30))
+        (srcdir / 'img' / ('bg%d.png' % i)).write_bytes(image)
+
+    toctree = ['.. toctree::', '']
+    for d in range(n_decks):
+        (srcdir / ('deck%d.rst' % d)).write_text(generate_deck(d, n_slides))
+        toctree.append('   deck%d' % d)
+
+    index = heading('Index', '=') + '\n' + '\n'.join(toctree) + '\n'
+    (srcdir / 'index.rst').write_text(index)
+
+
+class PhaseTimer:
+    """Accumulate the time spent in wrapped methods per phase."""
+
+    def __init__(self):
+        self.times = defaultdict(float)
+        self._patched = []
+
+    def wrap(self, owner, name: str, phase: str) -> None:
+        orig = owner.__dict__[name]
+        times = self.times
+
+        def wrapper(*args, **kwargs):
+            t = time.perf_counter()
+            try:
+                return orig(*args, **kwargs)
+            finally:
+                times[phase] += time.perf_counter() - t
+
+        setattr(owner, name, wrapper)
+        self._patched.append((owner, name, orig))
+
+    def __enter__(self):
+        self.wrap(Builder, 'read', 'read')
+        self.wrap(RevealjsImageCollector, 'process_doc', 'image_collector')
+        self.wrap(CSSClassCollector, 'process_doc', 'css_class_collector')
+        self.wrap(Builder, 'write', 'write')
+        self.wrap(RevealjsHTMLBuilder, 'copy_static_files', 'copy_static_files')
+        self.wrap(RevealjsHTMLBuilder, 'purge_css_file', 'purge')
+        return self
+
+    def __exit__(self, *exc):
+        for owner, name, orig in reversed(self._patched):
+            setattr(owner, name, orig)
+
+
+def build(srcdir: Path, outdir: Path, fresh: bool) -> dict:
+    """Build the project and return the duration of every phase."""
+    with PhaseTimer() as timer:
+        t = time.perf_counter()
+        app = Sphinx(str(srcdir), str(srcdir), str(outdir), str(outdir / '.doctrees'),
+                     'revealjs', status=None, warning=StringIO(), freshenv=fresh)
+        app.build(force_all=fresh)
+        timer.times['total'] = time.perf_counter() - t
+
+    if app.statuscode:
+        sys.exit('build failed')
+    return dict(timer.times)
+
+
+def summarize(runs: list) -> dict:
+    phases = {}
+    for phase in dict.fromkeys(phase for run in runs for phase in run):
+        values = [run.get(phase, 0.0) for run in runs]
+        phases[phase] = {
+            'min': min(values),
+            'median': statistics.median(values),
+            'max': max(values),
+        }
+    return phases
+
+
+def output_size(outdir: Path) -> int:
+    return sum(f.stat().st_size for f in outdir.rglob('*')
+               if f.is_file() and '.doctrees' not in f.parts)
+
+
+def main():
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        srcdir = args.keep or Path(tmp) / 'src'
+        outdir = srcdir / '_build'
+        write_project(srcdir, args.decks, args.slides)
+
+        full = []
+        for _ in range(args.repeat):
+            # Start without output and caches
+            shutil.rmtree(outdir, ignore_errors=True)
+            full.append(build(srcdir, outdir, fresh=True))
+
+        # Rebuild after changing one deck
+        incremental = []
+        for _ in range(args.repeat):
+            deck = srcdir / 'deck0.rst'
+            deck.write_text(deck.read_text() + '\n')
+            incremental.append(build(srcdir, outdir, fresh=False))
+
+        report = {
+            'config': {
+                'decks': args.decks, 'slides': args.slides, 'repeat': args.repeat,
+            },
+            'environment': {
+                'python': platform.python_version(),
+                'sphinx': sphinx.__version__,
+                'platform': platform.platform(),
+            },
+            'output_bytes': output_size(outdir),
+            'full': summarize(full),
+            'incremental': summarize(incremental),
+        }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
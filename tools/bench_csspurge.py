@@ -0,0 +1,154 @@
+"""Benchmark purging the bundled tailwind.css.
+
+Compares the current CSSPurge against the original character-by-character
+implementation, which is kept here as a reference.
+"""
+import argparse
+import time
+import tracemalloc
+from pathlib import Path
+
+from sphinx_revealit.csspurge import CSSIndex, CSSPurge, CSSRule
+
+ROOT_DIR = Path(__file__).parent.parent.absolute()
+TAILWIND = ROOT_DIR / 'sphinx_revealit' / 'res' / 'tailwind.css'
+
+# Classes as used in a deck, including responsive and state variants
+CLASSES = [
+    'grid', 'grid-cols-2', 'md:grid-cols-3', 'gap-4', 'text-left', 'text-right',
+    'text-red-500', 'hover:text-red-700', 'bg-purple-600', 'md:flex', 'flex',
+    'items-center', 'p-4', 'lg:p-8', 'mx-auto', 'animate-spin',
+]
+WHITELIST = set(CLASSES)
+# The original implementation split variant classes into their parts
+LEGACY_WHITELIST = {part for c in CLASSES for part in c.split(':')}
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-n', '--repeat', type=int, default=3)
+parser.add_argument('--css', type=Path, default=TAILWIND)
+
+
+def legacy_filter_comments(css):  # noqa: C901
+    output = ''
+    cright = ''
+    state = 0
+    first_comment = True
+
+    for c in css:
+        if state < 2:
+            output += c
+        elif first_comment:
+            cright += c
+
+        if state == 0 and c == '/':
+            state = 1
+        elif state == 1:
+            if c == '*':
+                state = 2
+                output = output[:-2]
+            else:
+                state = 0
+        elif state == 2 and c == '*':
+            state = 3
+        elif state == 3:
+            if c == '/':
+                state = 0
+                first_comment = False
+            else:
+                state = 2
+
+    return output, cright[:-2].strip()
+
+
+def legacy_parse(css):  # noqa: C901
+    in_comment = False
+    bracket_level = 0
+    dont_parse_next = False
+    cur_rule = ''
+    rules = []
+
+    for i, c in enumerate(css):
+        if (i + 1) < len(css):
+            nc = css[i + 1]
+        else:
+            nc = ''
+
+        cur_rule += c
+
+        if dont_parse_next:
+            dont_parse_next = False
+        elif in_comment:
+            if c == '*' and nc == '/':
+                in_comment = False
+                dont_parse_next = True
+        else:
+            if c == '/' and nc == '*':
+                in_comment = True
+                dont_parse_next = True
+
+            if c == '{':
+                bracket_level += 1
+            elif c == '}' and bracket_level > 0:
+                bracket_level -= 1
+                if bracket_level == 0:
+                    rules.append(CSSRule(cur_rule))
+                    cur_rule = ''
+
+    return rules
+
+
+def legacy_purge(css, whitelist):
+    whitelist = LEGACY_WHITELIST
+    no_comments, cright = legacy_filter_comments(css)
+    rules = [r for r in legacy_parse(no_comments) if r.matches_whitelist(whitelist)]
+    return '/* %s */ %s' % (cright, ''.join(str(r) for r in rules))
+
+
+def current_purge(css, whitelist):
+    return CSSPurge(css).purge(whitelist)
+
+
+def indexed_purge(css, whitelist, _index={}):
+    # Serialized index as stored in the purge cache
+    if 'data' not in _index:
+        _index['data'] = CSSIndex.from_css(css).dumps()
+    return CSSPurge(css, CSSIndex.loads(_index['data'])).purge(whitelist)
+
+
+def bench(func, css, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(css, WHITELIST)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def peak_memory(func, css):
+    tracemalloc.start()
+    func(css, WHITELIST)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main(args):  # noqa: D103
+    css = args.css.read_text(encoding='utf-8')
+    print(f'{args.css.name}: {len(css)} bytes, best of {args.repeat}')
+
+    t_legacy, out_legacy = bench(legacy_purge, css, args.repeat)
+    t_current, out_current = bench(current_purge, css, args.repeat)
+    t_indexed, _ = bench(indexed_purge, css, args.repeat)
+
+    print(f'legacy:  {t_legacy * 1000:8.1f} ms')
+    print(f'current: {t_current * 1000:8.1f} ms ({t_legacy / t_current:.1f}x)')
+    print(f'indexed: {t_indexed * 1000:8.1f} ms ({t_legacy / t_indexed:.1f}x)')
+    print(f'peak memory: {peak_memory(current_purge, css) / 2 ** 20:.1f} MiB '
+          f'(legacy {peak_memory(legacy_purge, css) / 2 ** 20:.1f} MiB)')
+    print(f'output:  {len(out_current)} bytes (legacy {len(out_legacy)} bytes)')
+
+
+if __name__ == '__main__':
+    main(parser.parse_args())
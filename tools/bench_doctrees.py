@@ -0,0 +1,90 @@
+"""Measure the size and load time of the pickled doctrees.
+
+Builds the presentations generated by ``bench_build.py`` and reports the
+size of the ``.doctree`` files (and of the Reveal.js elements they contain)
+and the time to load all of them, as Sphinx does for every written page.
+Run it on two revisions to compare the element model.
+"""
+import argparse
+import json
+import pickle
+import platform
+import sys
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+
+import sphinx
+from sphinx.application import Sphinx
+
+from bench_build import write_project
+from sphinx_revealit.nodes import RevealjsNode
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-d', '--decks', type=int, default=10)
+parser.add_argument('-s', '--slides', type=int, default=50)
+parser.add_argument('-n', '--repeat', type=int, default=5)
+parser.add_argument('-o', '--output', type=Path, help='write the JSON report to a file')
+
+
+def load_all(files: list) -> float:
+    """Return the time to unpickle all files."""
+    t = time.perf_counter()
+    for data in files:
+        pickle.loads(data)
+    return time.perf_counter() - t
+
+
+def element_bytes(doctrees: list) -> int:
+    """Return the pickled size of the Reveal.js elements of the doctrees."""
+    size = 0
+    for doctree in doctrees:
+        for node in doctree.traverse(RevealjsNode):
+            if node.revealit_el is not None:
+                size += len(pickle.dumps(node.revealit_el, pickle.HIGHEST_PROTOCOL))
+    return size
+
+
+def main():
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        srcdir = Path(tmp) / 'src'
+        outdir = srcdir / '_build'
+        write_project(srcdir, args.decks, args.slides)
+
+        app = Sphinx(str(srcdir), str(srcdir), str(outdir), str(outdir / '.doctrees'),
+                     'revealjs', status=None, warning=StringIO(), freshenv=True)
+        app.build(force_all=True)
+        if app.statuscode:
+            sys.exit('build failed')
+
+        doctrees = sorted((outdir / '.doctrees').glob('*.doctree'))
+        files = [f.read_bytes() for f in doctrees]
+        env_bytes = (outdir / '.doctrees' / 'environment.pickle').stat().st_size
+
+    loads = [load_all(files) for _ in range(args.repeat)]
+    report = {
+        'config': {'decks': args.decks, 'slides': args.slides, 'repeat': args.repeat},
+        'environment': {
+            'python': platform.python_version(),
+            'sphinx': sphinx.__version__,
+            'platform': platform.platform(),
+        },
+        'doctrees': len(files),
+        'doctree_bytes': sum(len(data) for data in files),
+        'element_bytes': element_bytes([pickle.loads(data) for data in files]),
+        'environment_bytes': env_bytes,
+        'load_seconds': {'min': min(loads), 'max': max(loads)},
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
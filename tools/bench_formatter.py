@@ -0,0 +1,78 @@
+"""Benchmark RjsPygmentsFormatter in table and compact mode.
+
+Reports formatter throughput and the size of the emitted markup
+(bytes and number of elements) for a generated Python listing.
+"""
+import argparse
+import io
+import re
+import time
+
+from pygments import lex
+from pygments.lexers import PythonLexer
+
+from sphinx_revealit.utils import RjsPygmentsFormatter
+
+_TAG_RE = re.compile(r'<[a-zA-Z]')
+
+SNIPPET = '''\
+class Slide{i}:
+    """A slide with some code."""
+
+    def __init__(self, title, items=None):
+        self.title = title
+        self.items = list(items or [])
+
+    def render(self) -> str:
+        # Render all items
+        return '\\n'.join('- %s' % item for item in self.items if item)
+
+'''
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-n', '--repeat', type=int, default=20)
+parser.add_argument('-l', '--lines', type=int, default=300)
+
+
+def generate_code(n_lines: int) -> str:
+    lines = []
+    i = 0
+    while len(lines) < n_lines:
+        lines.extend(SNIPPET.format(i=i).splitlines())
+        i += 1
+    return '\n'.join(lines[:n_lines]) + '\n'
+
+
+def bench(tokens: list, repeat: int, **options) -> tuple:
+    best = float('inf')
+    html = ''
+    for _ in range(repeat):
+        formatter = RjsPygmentsFormatter(**options)
+        t = time.perf_counter()
+        out = io.StringIO()
+        formatter.format_unencoded(iter(tokens), out)
+        html = out.getvalue()
+        best = min(best, time.perf_counter() - t)
+    return best, html
+
+
+def main():
+    args = parser.parse_args()
+    code = generate_code(args.lines)
+    tokens = list(lex(code, PythonLexer()))
+
+    print('%d lines, %d tokens' % (args.lines, len(tokens)))
+    print('%-8s %-8s %10s %12s %10s %10s' % (
+        'mode', 'linenos', 'ms', 'lines/s', 'bytes', 'elements'))
+
+    for compact in (False, True):
+        for linenos in (False, True):
+            seconds, html = bench(tokens, args.repeat, compact=compact, linenos=linenos)
+            print('%-8s %-8s %10.2f %12.0f %10d %10d' % (
+                'compact' if compact else 'table', linenos, seconds * 1000,
+                args.lines / seconds, len(html.encode('utf-8')),
+                len(_TAG_RE.findall(html))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Check that license comments survive purging and minifying stylesheets.
+
+Builds the demo presentation with tailwind, ``revealjs_purge_css`` and
+``revealjs_minify`` and compares the ``/*! ... */`` comments of the
+bundled stylesheets with those of the written files.
+"""
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+from sphinx.cmd.build import build_main
+
+ROOT_DIR = Path(__file__).parent.parent.absolute()
+DEMO_DIR = ROOT_DIR / 'demo' / 'revealjs4'
+PACKAGE_DIR = ROOT_DIR / 'sphinx_revealit'
+THEME_STATIC_DIR = PACKAGE_DIR / 'themes' / 'sphinx_revealit' / 'static'
+
+# Output file -> bundled source
+STYLESHEETS = {
+    '_static/tailwind.css': PACKAGE_DIR / 'res' / 'tailwind.css',
+    '_static/revealjs/reveal.css': THEME_STATIC_DIR / 'revealjs' / 'reveal.css',
+}
+
+_LICENSE_RE = re.compile(r'/\*!(.*?)\*/', re.S)
+
+
+def license_comments(css: str) -> list:
+    return [m.group() for m in _LICENSE_RE.finditer(css) if m.group(1).strip()]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        outdir = Path(tmp) / 'out'
+        doctrees = Path(tmp) / 'doctrees'
+        status = build_main(['-b', 'revealjs', '-q', '-E',
+                             '-D', 'revealjs_use_tailwind=1',
+                             '-D', 'revealjs_purge_tailwind=1',
+                             '-D', 'revealjs_purge_css=1',
+                             '-D', 'revealjs_minify=1',
+                             '-d', str(doctrees), str(DEMO_DIR), str(outdir)])
+        if status:
+            sys.exit(status)
+
+        missing = 0
+        for filename, source in STYLESHEETS.items():
+            written = (outdir / filename).read_text(encoding='utf-8')
+            for comment in license_comments(source.read_text(encoding='utf-8')):
+                if comment not in written:
+                    print('missing in %s: %s' % (filename, ' '.join(comment.split())))
+                    missing += 1
+
+        print('%d stylesheets, %d missing license comments'
+              % (len(STYLESHEETS), missing))
+        sys.exit(1 if missing else 0)
+
+
+if __name__ == '__main__':
+    main()
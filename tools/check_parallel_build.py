@@ -0,0 +1,83 @@
+"""Check that parallel builds produce the same output as serial builds.
+
+Creates a multi-deck project from the demo presentation (with different
+themes per deck) and builds it with ``-j 1`` and ``-j N``.
+"""
+import argparse
+import filecmp
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+from sphinx.cmd.build import build_main
+
+ROOT_DIR = Path(__file__).parent.parent.absolute()
+DEMO_DIR = ROOT_DIR / 'demo' / 'revealjs4'
+
+THEMES = ['black', 'white', 'league', 'beige', 'sky', 'night', 'serif', 'simple',
+          'solarized', 'moon']
+THEME_DIR = ROOT_DIR / 'sphinx_revealit' / 'res' / 'theme'
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-n', '--decks', type=int, default=12)
+parser.add_argument('-j', '--jobs', default='4')
+
+
+def write_project(srcdir: Path, n_decks: int):
+    shutil.copytree(DEMO_DIR, srcdir, ignore=shutil.ignore_patterns('_build'))
+    demo = (DEMO_DIR / 'index.rst').read_text()
+    toctree = ['.. toctree::', '']
+
+    for i in range(n_decks):
+        theme = THEMES[i % len(THEMES)]
+        if not (THEME_DIR / (theme + '.css')).exists():
+            theme = 'black'
+        deck = demo.replace(':theme: blood', f':theme: {theme}')
+        (srcdir / f'deck{i}.rst').write_text(deck)
+        toctree.append(f'   deck{i}')
+
+    (srcdir / 'index.rst').write_text(demo + '\n\n' + '\n'.join(toctree) + '\n')
+
+
+def compare(a: Path, b: Path) -> list:
+    """Return the relative paths of files differing between two output trees."""
+    differ = []
+    files_a = {p.relative_to(a) for p in a.rglob('*') if p.is_file()}
+    files_b = {p.relative_to(b) for p in b.rglob('*') if p.is_file()}
+
+    for f in sorted(files_a ^ files_b):
+        differ.append(str(f))
+    for f in sorted(files_a & files_b):
+        if f.name != '.buildinfo' and not filecmp.cmp(a / f, b / f, shallow=False):
+            differ.append(str(f))
+    return differ
+
+
+def main():
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        srcdir = tmp / 'src'
+        write_project(srcdir, args.decks)
+
+        outputs = []
+        for jobs in ('1', args.jobs):
+            outdir = tmp / f'out-j{jobs}'
+            doctrees = tmp / f'doctrees-j{jobs}'
+            status = build_main(['-b', 'revealjs', '-q', '-E', '-j', jobs,
+                                 '-d', str(doctrees), str(srcdir), str(outdir)])
+            if status:
+                sys.exit(status)
+            outputs.append(outdir)
+
+        differ = compare(*outputs)
+        for f in differ:
+            print('differs:', f)
+        print('%d decks, %d differing files' % (args.decks + 1, len(differ)))
+        sys.exit(1 if differ else 0)
+
+
+if __name__ == '__main__':
+    main()